@@ -0,0 +1,3 @@
+AnyPropertyType = 0
+PropertyChangeMask = 1 << 22
+PropertyNotify = 28
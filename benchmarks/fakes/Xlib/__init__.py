@@ -0,0 +1,2 @@
+"""Fake python-xlib serving a synthetic _NET_CLIENT_LIST."""
+from . import X
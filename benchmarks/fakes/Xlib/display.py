@@ -0,0 +1,42 @@
+# window id -> WM_CLASS class name; benchmarks fill this directly
+windows = {}
+
+
+class _Property:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Window:
+    def __init__(self, window_id):
+        self.window_id = window_id
+
+    def get_wm_class(self):
+        name = windows.get(self.window_id)
+        return (name.lower(), name) if name else None
+
+
+class _Root:
+    def get_full_property(self, atom, property_type):
+        return _Property(list(windows))
+
+
+class _Screen:
+    root = _Root()
+
+
+class Display:
+    def __init__(self, name=None):
+        self._screen = _Screen()
+
+    def screen(self):
+        return self._screen
+
+    def intern_atom(self, name):
+        return hash(name) & 0xffff
+
+    def create_resource_object(self, kind, resource_id):
+        return _Window(resource_id)
+
+    def close(self):
+        pass
@@ -0,0 +1,18 @@
+"""In-process stand-ins for psutil, pynput and Xlib used by the benchmarks.
+
+Putting this directory first on sys.path makes `import psutil` and friends
+resolve here, so the hot paths run on a headless box with synthetic data.
+"""
+import os
+import sys
+
+FAKES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def install():
+    """Shadow the real modules with the fakes for this interpreter."""
+    for name in list(sys.modules):
+        if name.split(".")[0] in ("psutil", "pynput", "Xlib"):
+            del sys.modules[name]
+    if FAKES_DIR not in sys.path:
+        sys.path.insert(0, FAKES_DIR)
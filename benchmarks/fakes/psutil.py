@@ -0,0 +1,37 @@
+"""Fake psutil backed by a synthetic process table."""
+
+# pid -> process name; benchmarks fill and churn this directly
+processes = {}
+
+
+class NoSuchProcess(Exception):
+    pass
+
+
+class AccessDenied(Exception):
+    pass
+
+
+class Process:
+    def __init__(self, pid):
+        if pid not in processes:
+            raise NoSuchProcess(pid)
+        self.pid = pid
+        self.info = {"pid": pid, "name": processes[pid]}
+
+    def name(self):
+        if self.pid not in processes:
+            raise NoSuchProcess(self.pid)
+        return processes[self.pid]
+
+    def exe(self):
+        return f"/usr/bin/{self.name()}"
+
+
+def pids():
+    return list(processes)
+
+
+def process_iter(attrs=None):
+    for pid in list(processes):
+        yield Process(pid)
@@ -0,0 +1 @@
+"""Fake pynput whose listeners never deliver events."""
@@ -0,0 +1,13 @@
+class Listener:
+    def __init__(self, **callbacks):
+        self.callbacks = callbacks
+        self._alive = False
+
+    def start(self):
+        self._alive = True
+
+    def stop(self):
+        self._alive = False
+
+    def is_alive(self):
+        return self._alive
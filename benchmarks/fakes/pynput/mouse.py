@@ -0,0 +1 @@
+from ._listener import Listener
@@ -0,0 +1,412 @@
+"""Benchmark Streakr's hot paths against synthetic data.
+
+psutil, pynput and Xlib are replaced by the fakes in benchmarks/fakes, so
+this runs on a plain headless Linux box. It measures
+
+- the per-tick cost (process snapshot plus usage accounting) with
+  --processes synthetic processes and 1-500 tracked apps, under the input
+  hook monitor and an IdleTimeMonitor over a stub idle-time backend,
+- JSON persistence cost against data-file size,
+- process classification with 10-5000 match rules, cold and cached,
+- window enumeration, as done by get_active_windows(),
+- stats rendering (StreakTrackerGUI._update_display) against app count,
+  including redrawing the heatmaps over HISTORY_YEARS years of usage,
+  when Tk can open a display; otherwise that section records why it was
+  skipped.
+
+Results are written as JSON. Pass --compare with an earlier report to print
+how each median changed:
+
+    python benchmarks/hot_paths.py [--output report.json] [--compare old.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import install as install_fakes  # noqa: E402
+
+install_fakes()
+sys.path.insert(0, ROOT)
+
+APP_COUNTS = (1, 10, 50, 100, 250, 500)
+RECORD_COUNTS = (10, 100, 1000, 5000)
+WINDOW_COUNTS = (10, 100, 500)
+RULE_COUNTS = (10, 100, 1000, 5000)
+HISTORY_YEARS = 3
+
+
+def measure(func, repeat, setup=None):
+    """Time `func` `repeat` times, running `setup` untimed before each call."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "min_ms": round(samples[0], 4),
+        "runs": repeat,
+    }
+
+
+def app_config(apps):
+    """Config tracking `apps` synthetic applications."""
+    return {
+        "applications": {f"app-{i}": {"name": f"App {i}", "min_minutes": 30} for i in range(apps)},
+        "check_interval": 60,
+    }
+
+
+def streak_records(apps):
+    """Streak data for `apps` synthetic applications, part way through today."""
+    today = time.strftime("%Y-%m-%d")
+    return {
+        f"App {i}": {
+            "current_streak": i % 40,
+            "longest_streak": i % 40 + 5,
+            "last_used_date": today,
+            "today_usage": (i * 7) % 45,
+            "streak_date": today if (i * 7) % 45 >= 30 else None,
+            "usage_date": today,
+        }
+        for i in range(apps)
+    }
+
+
+def usage_history(apps, years=HISTORY_YEARS):
+    """Daily usage of `apps` synthetic applications over the `years` before today."""
+    import datetime
+
+    today = datetime.date.today()
+    days = [(today - datetime.timedelta(days=offset)).isoformat() for offset in range(1, years * 365 + 1)]
+    return {f"App {i}": {day: (i * 7 + n) % 60 for n, day in enumerate(days) if (i + n) % 5}
+            for i in range(apps)}
+
+
+def fill_process_table(processes, apps):
+    """Fill the fake process table; every other tracked app is running."""
+    import psutil
+
+    psutil.processes.clear()
+    running = [f"app-{i}" for i in range(0, apps, 2)]
+    for pid in range(1, processes + 1):
+        if pid <= len(running):
+            psutil.processes[pid] = running[pid - 1]
+        else:
+            psutil.processes[pid] = f"proc-{pid % 700}"
+
+
+def churn_processes(count, rng):
+    """Replace `count` untracked processes with new PIDs, like normal churn."""
+    import psutil
+
+    victims = [pid for pid in rng.sample(list(psutil.processes), count)
+               if psutil.processes[pid].startswith("proc-")]
+    next_pid = max(psutil.processes) + 1
+    for offset, pid in enumerate(victims):
+        psutil.processes[next_pid + offset] = psutil.processes.pop(pid)
+
+
+def bench_tick(args):
+    import psutil
+    from streakr.activityMonitor import ActivityMonitor, IdleTimeMonitor
+    from streakr.processTracker import ProcessTracker
+    from streakr.utils import UsageClock, get_process_snapshot, track_all_apps
+
+    class SyntheticProcessTracker(ProcessTracker):
+        # Read PIDs from the fake psutil instead of /proc
+        def _list_pids(self):
+            return set(psutil.pids())
+
+    class StubIdleBackend:
+        # Counts the OS idle-time reads an IdleTimeMonitor makes
+        name = "stub"
+        queries = 0
+
+        def idle_seconds(self):
+            self.queries += 1
+            return 0
+
+        def close(self):
+            pass
+
+    rng = random.Random(0)
+    monitor = ActivityMonitor(low_overhead=True)
+    monitor.start()
+    idle_backend = StubIdleBackend()
+    idle_monitor = IdleTimeMonitor(idle_backend)
+    idle_monitor.start()
+    results = []
+    try:
+        for apps in args.apps:
+            fill_process_table(args.processes, apps)
+            config = app_config(apps)
+            streak_data = {}
+            tracker = SyntheticProcessTracker(use_events=False, resync_interval=0)
+            clock = UsageClock()
+            tracker.snapshot()
+
+            # Like the engine, each tick reads the user's activity once
+            def tick(monitor=monitor):
+                snapshot = tracker.snapshot()
+                track_all_apps(config, streak_data, snapshot, monitor.is_active, clock)
+
+            def account_only():
+                track_all_apps(config, streak_data, tracker.snapshot(), monitor.is_active, clock)
+
+            queries_before = idle_backend.queries
+            tick(idle_monitor)
+            idle_queries = idle_backend.queries - queries_before
+            results.append({
+                "apps": apps,
+                "processes": args.processes,
+                "tick": measure(tick, args.repeat, lambda: churn_processes(args.churn, rng)),
+                "tick_idle_time": measure(lambda: tick(idle_monitor), args.repeat,
+                                          lambda: churn_processes(args.churn, rng)),
+                "idle_queries_per_tick": idle_queries,
+                "tick_no_churn": measure(account_only, args.repeat),
+                "full_scan": measure(get_process_snapshot, max(1, args.repeat // 5)),
+            })
+            tracker.close()
+    finally:
+        monitor.stop()
+        idle_monitor.close()
+    return results
+
+
+def bench_persistence(args):
+    from streakr.storage import ColumnarStore, EventLogStore, JsonStore
+    from streakr.utils import save_streak_data
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for records in args.records:
+            streak_data = streak_records(records)
+            plain_file = os.path.join(tmp, f"plain-{records}.json")
+            store = JsonStore(os.path.join(tmp, f"store-{records}.json"))
+            log_store = EventLogStore(os.path.join(tmp, f"log-{records}.json"))
+            columnar_store = ColumnarStore(os.path.join(tmp, f"columnar-{records}.json"))
+            columnar_store.load()
+            one_app = {"App 0"}
+
+            def bump():
+                streak_data["App 0"]["today_usage"] += 1
+
+            save_streak_data(plain_file, streak_data)
+            results.append({
+                "records": records,
+                "file_bytes": os.path.getsize(plain_file),
+                "save_streak_data": measure(lambda: save_streak_data(plain_file, streak_data), args.repeat, bump),
+                "json_store": measure(lambda: store.save(streak_data, dirty=one_app), args.repeat, bump),
+                "event_log_store": measure(lambda: log_store.save(streak_data, dirty=one_app), args.repeat, bump),
+                "columnar_store": measure(lambda: columnar_store.save(streak_data, dirty=one_app), args.repeat, bump),
+            })
+            store.close()
+            log_store.close()
+            columnar_store.close()
+    return results
+
+
+def bench_matching(args):
+    import psutil
+    from streakr.processMatcher import ProcessMatcher
+
+    results = []
+    for rules in args.rules:
+        fill_process_table(args.processes, 0)
+        identities = [(name, f"/usr/bin/{name}") for name in set(psutil.processes.values())]
+        # A mix of globs, regexes and exe rules, a few per app
+        applications = {}
+        for i in range(0, rules, 4):
+            applications[f"app-{i}"] = {"name": f"App {i}", "min_minutes": 30, "match": [
+                f"tool-{i}-*", f"re:svc{i}\\.v\\d+", f"exe:/opt/app{i}/*"]}
+        applications["proc-7"] = {"name": "Proc 7", "min_minutes": 30, "match": ["proc-1*"]}
+
+        def classify_cold():
+            ProcessMatcher(applications).running_apps(identities)
+
+        matcher = ProcessMatcher(applications)
+        matcher.running_apps(identities)
+        results.append({
+            "rules": matcher.rule_count,
+            "processes": len(identities),
+            "compile": measure(lambda: ProcessMatcher(applications), max(1, args.repeat // 5)),
+            "classify_cold": measure(classify_cold, max(1, args.repeat // 5)),
+            "classify_cached": measure(lambda: matcher.running_apps(identities), args.repeat),
+        })
+    return results
+
+
+def bench_windows(args):
+    import Xlib.display
+    from streakr.windowEnumerator import WindowEnumerator
+
+    results = []
+    for windows in args.windows:
+        Xlib.display.windows.clear()
+        Xlib.display.windows.update({0x400000 + i: f"App{i % 200}" for i in range(windows)})
+        enumerator = WindowEnumerator()
+        results.append({
+            "windows": windows,
+            "cold": measure(enumerator.refresh, 1),
+            "warm": measure(enumerator.refresh, args.repeat),
+        })
+        enumerator.close()
+    return results
+
+
+def bench_render(args):
+    import tkinter as tk
+    from tkinter import ttk
+    from streakr.gui import StreakTrackerGUI
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"skipped": str(e)}
+    root.withdraw()
+
+    # Only the stats tab is built; no engine or other tabs are needed
+    gui = StreakTrackerGUI.__new__(StreakTrackerGUI)
+    gui.root = root
+    gui.stats_frame = ttk.Frame(root)
+    gui.usage_history = {}
+    gui._build_stats_tab()
+
+    def render():
+        gui._update_display()
+        root.update_idletasks()
+
+    results = []
+    try:
+        for apps in args.apps:
+            streak_data = streak_records(apps)
+            gui.usage_history = usage_history(apps)
+            gui.snapshot = {"config": app_config(apps), "streak_data": streak_data}
+
+            def bump():
+                for record in streak_data.values():
+                    record["today_usage"] += 0.5
+
+            def reload_history():
+                # As Refresh Stats does: every heatmap re-renders its years
+                for app_name, widgets in gui.stat_widgets.items():
+                    widgets["heatmap"].set_history(gui.usage_history.get(app_name, {}))
+
+            results.append({
+                "apps": apps,
+                "history_years": HISTORY_YEARS,
+                "first_render": measure(render, 1),
+                "unchanged": measure(render, args.repeat),
+                "all_changed": measure(render, args.repeat, bump),
+                "history_reloaded": measure(render, max(1, args.repeat // 5), reload_history),
+            })
+            gui.snapshot = {"config": app_config(0), "streak_data": {}}
+            gui.usage_history = {}
+            render()
+    finally:
+        root.destroy()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    """Print how each median changed between two reports."""
+    for section, rows in new.items():
+        old_rows = old.get(section)
+        if not isinstance(rows, list) or not isinstance(old_rows, list):
+            continue
+        for row in rows:
+            key_name = next(iter(row))
+            match = next((r for r in old_rows if r.get(key_name) == row[key_name]), None)
+            if match is None:
+                continue
+            for metric, value in row.items():
+                if not isinstance(value, dict) or metric not in match:
+                    continue
+                before, after = match[metric]["median_ms"], value["median_ms"]
+                ratio = after / before if before else float("inf")
+                print(f"{section} {key_name}={row[key_name]} {metric}: "
+                      f"{before:.3f} -> {after:.3f} ms ({ratio:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "report.json"),
+                        help="where to write the JSON report (default: %(default)s)")
+    parser.add_argument("--compare", help="earlier report to compare the results against")
+    parser.add_argument("--processes", type=int, default=5000, help="synthetic processes (default: %(default)s)")
+    parser.add_argument("--churn", type=int, default=20, help="processes replaced per tick (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs per measurement (default: %(default)s)")
+    parser.add_argument("--apps", type=int, nargs="+", default=APP_COUNTS, help="tracked app counts")
+    parser.add_argument("--records", type=int, nargs="+", default=RECORD_COUNTS, help="streak record counts")
+    parser.add_argument("--windows", type=int, nargs="+", default=WINDOW_COUNTS, help="window counts")
+    parser.add_argument("--rules", type=int, nargs="+", default=RULE_COUNTS, help="match rule counts")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "processes": args.processes,
+            "repeat": args.repeat,
+        },
+        "tick": bench_tick(args),
+        "persistence": bench_persistence(args),
+        "matching": bench_matching(args),
+        "windows": bench_windows(args),
+        "render": bench_render(args),
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+
+    for row in report["tick"]:
+        print(f"tick: {row['apps']} apps, {row['processes']} processes: {row['tick']['median_ms']:.3f} ms, "
+              f"{row['tick_idle_time']['median_ms']:.3f} ms with {row['idle_queries_per_tick']} idle queries")
+    for row in report["persistence"]:
+        print(f"persistence: {row['records']} records ({row['file_bytes']} bytes): "
+              f"{row['save_streak_data']['median_ms']:.3f} ms")
+    for row in report["matching"]:
+        print(f"matching: {row['rules']} rules, {row['processes']} names: "
+              f"{row['classify_cold']['median_ms']:.3f} ms cold, {row['classify_cached']['median_ms']:.3f} ms cached")
+    for row in report["windows"]:
+        print(f"windows: {row['windows']} windows: {row['warm']['median_ms']:.3f} ms")
+    if isinstance(report["render"], dict):
+        print(f"render: skipped ({report['render']['skipped']})")
+    else:
+        for row in report["render"]:
+            print(f"render: {row['apps']} apps: {row['all_changed']['median_ms']:.3f} ms, "
+                  f"{row['history_reloaded']['median_ms']:.3f} ms after reloading {row['history_years']} years")
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Check Streakr's cold-start import cost.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+fails when the module's cumulative import time exceeds the budget, or when
+it pulls in a heavy or platform-specific dependency that should only be
+imported on first use.
+
+    python benchmarks/import_budget.py [--module streakr.cli] [--budget-ms 150]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+# Dependencies that must not be imported just by loading the CLI or engine
+LAZY_MODULES = ("psutil", "pynput", "tkinter", "sqlite3", "numpy", "Xlib", "Quartz", "win32gui")
+
+
+def measure(module):
+    """Return ({imported module: cumulative us}, stderr) for importing `module`."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, cwd=root)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            timings[name] = int(cumulative)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", action="append",
+                        help="module to import (repeatable; default: streakr.cli and streakr.engine)")
+    parser.add_argument("--budget-ms", type=float, default=150,
+                        help="maximum cumulative import time per module (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.module or ["streakr.cli", "streakr.engine"]:
+        timings = measure(module)
+        total_ms = timings.get(module, 0) / 1000
+        eager = sorted(name for name in timings if name.split(".")[0] in LAZY_MODULES)
+        status = "ok"
+        if total_ms > args.budget_ms:
+            status = f"over budget ({args.budget_ms:.0f} ms)"
+            failed = True
+        if eager:
+            status = f"imports {', '.join(eager)} eagerly"
+            failed = True
+        print(f"{module}: {total_ms:.1f} ms {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,10 @@ def main():
     app = StreakTrackerGUI(root)
     
     def on_closing():
-        if app.running:
-            app.running = False
-            app.activity_monitor.stop()
+        # Stops tracking and flushes pending writes
+        app.ui_updates.stop()
+        app.engine.close()
+        app.window_enumerator.close()
         root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
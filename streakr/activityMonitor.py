@@ -1,69 +1,407 @@
+import os
+import sys
 import time
+import shutil
 import threading
-from pynput import mouse, keyboard
+import subprocess
+
+IDLE_BACKENDS = ("auto", "xscreensaver", "logind", "hooks")
 
 class ActivityMonitor:
     """Monitors keyboard and mouse activity."""
-    def __init__(self, inactivity_timeout=60):  # Default 60 seconds timeout
+    def __init__(self, inactivity_timeout=60, low_overhead=False, move_throttle_ms=250):  # Default 60 seconds timeout
         self.inactivity_timeout = inactivity_timeout
-        self.last_activity = time.time()
+        self.last_activity = time.monotonic()
         self.is_active = True
         self.running = False
         self.monitor_thread = None
         
-        # Setup listeners
-        self.mouse_listener = mouse.Listener(on_move=self._on_activity, 
+        # The monitor thread sleeps on this until the inactivity deadline,
+        # an inactive -> active transition, or stop()
+        self._cond = threading.Condition()
+        self._subscribers = []
+        self._generation = 0  # bumped by start() and stop(); a thread exits once it changes
+        
+        # Low-overhead mode skips per-event output and samples mouse moves,
+        # refreshing the activity timestamp at most every move_throttle_ms.
+        self.low_overhead = low_overhead
+        self.move_throttle = move_throttle_ms / 1000
+        self.events_received = 0
+        self.events_coalesced = 0
+        
+        # Listeners are created on start(), so pynput is only imported when used
+        self.mouse_listener = None
+        self.keyboard_listener = None
+    
+    def _create_listeners(self):
+        """Create fresh mouse and keyboard listeners."""
+        from pynput import mouse, keyboard
+        
+        on_move = self._on_move if self.low_overhead else self._on_activity
+        self.mouse_listener = mouse.Listener(on_move=on_move, 
                                             on_click=self._on_activity, 
                                             on_scroll=self._on_activity)
         self.keyboard_listener = keyboard.Listener(on_press=self._on_activity)
     
     def _on_activity(self, *args, **kwargs):
         """Called when activity is detected."""
-        self.last_activity = time.time()
-        print("activity detected")
+        self.events_received += 1
+        self.last_activity = time.monotonic()
+        if not self.low_overhead:
+            print("activity detected")
         if not self.is_active:
+            self._mark_active()
+    
+    def _on_move(self, *args):
+        """Called for mouse moves in low-overhead mode."""
+        self.events_received += 1
+        now = time.monotonic()
+        if now - self.last_activity < self.move_throttle:
+            self.events_coalesced += 1
+            return
+        self.last_activity = now
+        if not self.is_active:
+            self._mark_active()
+    
+    def _mark_active(self):
+        """Switch to active and wake the monitor so it re-arms its deadline."""
+        with self._cond:
+            if self.is_active:
+                return
             self.is_active = True
+            self._cond.notify_all()
+        self._publish(True)
+    
+    def _publish(self, is_active):
+        for callback in list(self._subscribers):
+            callback(is_active)
+    
+    def subscribe(self, callback):
+        """Call `callback(is_active)` on every active/inactive transition.
+        
+        Callbacks run on the monitor or listener thread that saw the change.
+        """
+        self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback):
+        """Stop calling a previously subscribed callback."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+    
+    def set_inactivity_timeout(self, inactivity_timeout):
+        """Change the timeout and re-arm the deadline."""
+        with self._cond:
+            self.inactivity_timeout = inactivity_timeout
+            self._cond.notify_all()
+    
+    def stats(self):
+        """Return input hook counters."""
+        return {
+            "events_received": self.events_received,
+            "events_coalesced": self.events_coalesced,
+        }
     
     def start(self):
         """Start monitoring activity."""
         if self.running:
             return
             
-        self.running = True
-        self.last_activity = time.time()
-        self.is_active = True
+        # Create the listeners first, so a missing pynput leaves the monitor stopped
+        self._create_listeners()
+        with self._cond:
+            self.running = True
+            self.last_activity = time.monotonic()
+            self.is_active = True
+            self._generation += 1
+            generation = self._generation
         
         # Start listeners
         self.mouse_listener.start()
         self.keyboard_listener.start()
         
         # Start monitor thread
-        self.monitor_thread = threading.Thread(target=self._monitor_activity, daemon=True)
+        self.monitor_thread = threading.Thread(target=self._monitor_activity, args=(generation,), daemon=True)
         self.monitor_thread.start()
     
     def stop(self):
         """Stop monitoring activity."""
-        self.running = False
+        with self._cond:
+            self.running = False
+            self._generation += 1
+            self._cond.notify_all()
         
-        # Stop listeners
-        if self.mouse_listener.is_alive():
+        # Stop listeners; pynput listeners are threads and cannot be restarted
+        if self.mouse_listener and self.mouse_listener.is_alive():
             self.mouse_listener.stop()
-        if self.keyboard_listener.is_alive():
+        if self.keyboard_listener and self.keyboard_listener.is_alive():
             self.keyboard_listener.stop()
-            
-        # Create new listeners for next time
-        self.mouse_listener = mouse.Listener(on_move=self._on_activity, 
-                                            on_click=self._on_activity, 
-                                            on_scroll=self._on_activity)
-        self.keyboard_listener = keyboard.Listener(on_press=self._on_activity)
     
-    def _monitor_activity(self):
-        """Thread to monitor for inactivity."""
-        while self.running:
-            # Check if inactive
-            if time.time() - self.last_activity > self.inactivity_timeout:
-                if self.is_active:
-                    self.is_active = False
-            
-            # Wait a bit before checking again
-            time.sleep(1)
+    def close(self):
+        self.stop()
+    
+    def _monitor_activity(self, generation):
+        """Thread to monitor for inactivity.
+        
+        Sleeps until last_activity + inactivity_timeout rather than polling.
+        Activity only moves the deadline forward, so it is re-read when the
+        old one expires; once inactive the thread sleeps until activity resumes.
+        A stop() followed quickly by start() leaves only the new thread running.
+        """
+        while True:
+            with self._cond:
+                while self._generation == generation:
+                    if not self.is_active:
+                        self._cond.wait()
+                        continue
+                    remaining = self.last_activity + self.inactivity_timeout - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._generation != generation:
+                    return
+                self.is_active = False
+            self._publish(False)
+
+
+class AlwaysActiveMonitor:
+    """Stand-in for ActivityMonitor that treats the user as always active.
+    
+    Used where no input devices can be hooked, such as a headless daemon.
+    """
+    def __init__(self, inactivity_timeout=60):
+        self.inactivity_timeout = inactivity_timeout
+        self.is_active = True
+        self.running = False
+    
+    def start(self):
+        self.running = True
+    
+    def stop(self):
+        self.running = False
+    
+    def close(self):
+        self.stop()
+    
+    def subscribe(self, callback):
+        pass
+    
+    def unsubscribe(self, callback):
+        pass
+    
+    def set_inactivity_timeout(self, inactivity_timeout):
+        self.inactivity_timeout = inactivity_timeout
+    
+    def stats(self):
+        return {"events_received": 0, "events_coalesced": 0}
+
+
+class XScreenSaverIdle:
+    """Reads the user's idle time from the X server's MIT-SCREEN-SAVER extension."""
+    name = "xscreensaver"
+
+    def __init__(self):
+        import Xlib.display
+        from Xlib.ext import screensaver  # registers screensaver_query_info
+
+        self.display = Xlib.display.Display()
+        try:
+            if not self.display.has_extension("MIT-SCREEN-SAVER"):
+                raise OSError("the X server has no MIT-SCREEN-SAVER extension")
+            self.root = self.display.screen().root
+            self.idle_seconds()
+        except Exception:
+            self.display.close()
+            raise
+
+    def idle_seconds(self):
+        return self.root.screensaver_query_info().idle / 1000
+
+    def close(self):
+        self.display.close()
+
+
+class LogindIdle:
+    """Reads the session's IdleHint from systemd-logind.
+
+    The desktop environment sets the hint after its own idle delay, so idle
+    periods shorter than that delay read as zero.
+    """
+    name = "logind"
+
+    def __init__(self):
+        if shutil.which("loginctl") is None:
+            raise OSError("loginctl is not available")
+        self.session = os.environ.get("XDG_SESSION_ID", "auto")
+        self.idle_seconds()
+
+    def idle_seconds(self):
+        output = subprocess.run(
+            ["loginctl", "show-session", self.session, "-p", "IdleHint", "-p", "IdleSinceHintMonotonic"],
+            capture_output=True, text=True, check=True, timeout=5).stdout
+        values = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+        if values.get("IdleHint") != "yes":
+            return 0
+        # Microseconds of CLOCK_MONOTONIC, the clock behind time.monotonic() on Linux
+        since = int(values.get("IdleSinceHintMonotonic", 0))
+        return max(0, time.monotonic() - since / 1e6) if since else 0
+
+    def close(self):
+        pass
+
+
+def get_idle_backend(name="auto"):
+    """Return an OS idle-time reader for `name`, or None if none is usable.
+
+    "auto" prefers logind under Wayland, where X only sees its own clients,
+    and the X screensaver extension otherwise.
+    """
+    if name not in IDLE_BACKENDS:
+        print(f"Unknown idle_backend {name!r}; expected one of {', '.join(IDLE_BACKENDS)}")
+        return None
+    if name == "hooks" or not sys.platform.startswith("linux"):
+        return None
+    if name == "auto":
+        candidates = [XScreenSaverIdle, LogindIdle]
+        if os.environ.get("WAYLAND_DISPLAY"):
+            candidates.reverse()
+    else:
+        candidates = [backend for backend in (XScreenSaverIdle, LogindIdle) if backend.name == name]
+    for backend in candidates:
+        try:
+            return backend()
+        except ImportError:
+            if name != "auto":
+                print("Please install python-xlib to read the idle time from X")
+        except Exception as e:
+            if name != "auto":
+                print(f"Cannot read the idle time from {backend.name}: {e}")
+    return None
+
+
+class IdleTimeMonitor:
+    """ActivityMonitor stand-in driven by the idle time the OS reports.
+
+    No Python code runs per input event. The idle time is read whenever
+    is_active is checked, such as once per tick, and by a thread that sleeps
+    until the user could first have been idle for `inactivity_timeout`; while
+    inactive it re-reads every `resume_poll` seconds to notice the user
+    coming back, so subscribers see both transitions. Reads can be slow
+    (logind runs loginctl), so displays should follow those transitions
+    rather than read is_active.
+    """
+    def __init__(self, idle_backend, inactivity_timeout=60, resume_poll=2):
+        self.idle_backend = idle_backend
+        self.inactivity_timeout = inactivity_timeout
+        self.resume_poll = resume_poll
+        self.running = False
+        self.idle_queries = 0
+        self.query_errors = 0
+        self._active = True
+        self._cond = threading.Condition()
+        self._query_lock = threading.Lock()
+        self._subscribers = []
+        self._generation = 0  # bumped by start() and stop(); a thread exits once it changes
+
+    @property
+    def is_active(self):
+        """Whether the user was active within the timeout, read from the OS while running."""
+        if self.running:
+            self._check()
+        return self._active
+
+    def subscribe(self, callback):
+        """Call `callback(is_active)` on every active/inactive transition.
+
+        Callbacks run on whichever thread read the idle time.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def set_inactivity_timeout(self, inactivity_timeout):
+        with self._cond:
+            self.inactivity_timeout = inactivity_timeout
+            self._cond.notify()
+
+    def stats(self):
+        return {"events_received": 0, "events_coalesced": 0,
+                "idle_queries": self.idle_queries, "query_errors": self.query_errors}
+
+    def start(self):
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+            self._active = True
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(target=self._monitor_idle, args=(generation,), daemon=True).start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._generation += 1
+            self._cond.notify()
+
+    def close(self):
+        """Stop and close the idle-time backend."""
+        self.stop()
+        with self._query_lock:
+            self.idle_backend.close()
+
+    def _check(self):
+        """Read the idle time, publish a transition if there was one, and return it."""
+        with self._query_lock:
+            self.idle_queries += 1
+            try:
+                idle = self.idle_backend.idle_seconds()
+            except Exception:
+                # Count the user as active rather than lose usage on a failed read
+                self.query_errors += 1
+                idle = 0
+            active = idle < self.inactivity_timeout
+            changed = active != self._active
+            self._active = active
+        if changed:
+            for callback in list(self._subscribers):
+                callback(active)
+        return idle
+
+    def _monitor_idle(self, generation):
+        # A stop() followed quickly by start() leaves only the new thread polling
+        while True:
+            idle = self._check()
+            with self._cond:
+                if self._generation != generation:
+                    return
+                if self._active:
+                    # Nothing can change before the idle time reaches the timeout
+                    delay = max(self.resume_poll, self.inactivity_timeout - idle)
+                else:
+                    delay = self.resume_poll
+                self._cond.wait(delay)
+                if self._generation != generation:
+                    return
+
+
+def create_activity_monitor(config):
+    """Build the activity monitor selected by config["idle_backend"].
+
+    The OS idle time is used when it can be read; otherwise, or with
+    "hooks", keyboard and mouse listeners are installed. Without pynput
+    the user is counted as always active.
+    """
+    inactivity_timeout = config.get("inactivity_timeout", 120)
+    backend = get_idle_backend(config.get("idle_backend", "auto"))
+    if backend is not None:
+        return IdleTimeMonitor(backend, inactivity_timeout=inactivity_timeout)
+    try:
+        from pynput import mouse, keyboard
+    except Exception as e:
+        # pynput raises ImportError, among others, where it cannot hook input (e.g. no display)
+        print(f"Cannot monitor keyboard and mouse activity ({e}); counting the user as always active")
+        return AlwaysActiveMonitor(inactivity_timeout=inactivity_timeout)
+    return ActivityMonitor(inactivity_timeout=inactivity_timeout, low_overhead=True,
+                           move_throttle_ms=config.get("move_throttle_ms", 250))
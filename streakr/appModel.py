@@ -0,0 +1,297 @@
+import datetime
+from collections.abc import MutableMapping
+
+# Field -> (accepted types, value for a new app); None means the field starts absent
+RECORD_FIELDS = {
+    "current_streak": (int, 0),
+    "longest_streak": (int, 0),
+    "last_used_date": (str, None),
+    "today_usage": ((int, float), 0),
+    "streak_date": (str, None),
+    "usage_date": (str, None),
+    "previous_date": (str, None),
+    "previous_usage": ((int, float), None),
+}
+NEW_RECORD_FIELDS = ("current_streak", "longest_streak", "last_used_date", "today_usage", "streak_date")
+
+
+class StreakRecord(MutableMapping):
+    """One app's streak state in slots instead of a dict.
+
+    It behaves like the record dicts the tracking, persistence and recompute
+    code already handle, including absent keys (an unset slot), so it can be
+    used anywhere a record dict is expected. dict(record) gives the stored form.
+    """
+    __slots__ = tuple(RECORD_FIELDS)
+
+    def __init__(self, values=None):
+        if values is None:
+            values = {field: RECORD_FIELDS[field][1] for field in NEW_RECORD_FIELDS}
+        for key, value in values.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, app_name, data):
+        """Validate a stored record, dropping (and reporting) fields that cannot be used."""
+        record = cls({})
+        for key, value in data.items():
+            if key not in RECORD_FIELDS:
+                print(f"Ignoring unknown field {key!r} in the streak data of {app_name}")
+                continue
+            types, default = RECORD_FIELDS[key]
+            if value is None:
+                valid = default is None
+            else:
+                valid = isinstance(value, types) and not isinstance(value, bool)
+            if valid and value is not None and types is str:
+                try:
+                    datetime.date.fromisoformat(value)
+                except ValueError:
+                    valid = False
+            if not valid:
+                print(f"Ignoring invalid {key} {value!r} in the streak data of {app_name}")
+                continue
+            record[key] = value
+        for key in NEW_RECORD_FIELDS:
+            if key not in record:
+                record[key] = RECORD_FIELDS[key][1]
+        return record
+
+    def __getitem__(self, key):
+        if key in RECORD_FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key in RECORD_FIELDS:
+            try:
+                return delattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (field for field in RECORD_FIELDS if hasattr(self, field))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"StreakRecord({dict(self)!r})"
+
+
+class TrackedApp:
+    """A tracked application: its stable ID, config entry and streak record."""
+    __slots__ = ("id", "process", "name", "min_minutes", "match", "record")
+
+    def __init__(self, app_id, process, name, min_minutes, match=None, record=None):
+        self.id = app_id
+        self.process = process
+        self.name = name
+        self.min_minutes = min_minutes
+        self.match = match
+        self.record = record
+
+    def to_config(self):
+        """Return the app's entry for config["applications"]."""
+        entry = {"id": self.id, "name": self.name, "min_minutes": self.min_minutes}
+        if self.match:
+            entry["match"] = self.match
+        return entry
+
+
+class AppModel:
+    """Tracked apps indexed by stable ID, process name and display name.
+
+    Built from config["applications"] (keyed by process) and the streak data
+    (keyed by display name), which it validates once and then keeps in sync:
+    both dicts stay the serialized form the files, the stores and the
+    snapshots use, while lookups in either direction are single dict hits.
+    Each app gets an integer "id" in its config entry, so an app whose
+    display name or process changes is recognised and keeps its streak.
+    Entries that fail validation are not tracked but are kept in `rejected`,
+    and config_entries() writes them back unchanged for the user to fix.
+    """
+    def __init__(self, applications, streak_data):
+        self.applications = applications
+        self.streak_data = streak_data
+        self.by_id = {}
+        self.by_process = {}
+        self.by_name = {}
+        self._next_id = 1
+        # True when validation rewrote config entries that should be saved
+        self.config_changed = False
+        self.rejected = {}  # process -> entry that failed validation, as read
+
+        for app_name, data in list(streak_data.items()):
+            if not isinstance(data, StreakRecord):
+                streak_data[app_name] = StreakRecord.from_dict(app_name, data)
+        self._load(dict(applications))
+
+    def get(self, process):
+        return self.by_process.get(process)
+
+    def named(self, name):
+        return self.by_name.get(name)
+
+    def config_entries(self):
+        """Return config["applications"] as it should be saved, rejected entries included."""
+        return dict(self.rejected, **self.applications)
+
+    def thresholds(self):
+        """Return {display name: min_minutes} for the tracked apps."""
+        return {name: app.min_minutes for name, app in self.by_name.items()}
+
+    def add(self, process, name, min_minutes, match=None):
+        """Track `process`, or update it if tracked already; returns (app, old name or None).
+
+        Raises ValueError if another app already uses the display name.
+        """
+        app = self.by_process.get(process)
+        other = self.by_name.get(name)
+        if other is not None and other is not app:
+            raise ValueError(f"{name} is already the name of {other.process}.")
+        renamed = None
+        self.rejected.pop(process, None)
+        if app is None:
+            app = self._add(self._next_id, process, name, min_minutes, match)
+        else:
+            app.min_minutes = min_minutes
+            if match is not None:
+                app.match = match
+            if name != app.name:
+                renamed = app.name
+                self._rename(app, name)
+        self.applications[process] = app.to_config()
+        return app, renamed
+
+    def remove(self, process):
+        """Stop tracking `process` and drop its streak record; returns the app or None."""
+        self.rejected.pop(process, None)
+        app = self.by_process.pop(process, None)
+        if app is None:
+            return None
+        del self.by_id[app.id]
+        del self.by_name[app.name]
+        self.applications.pop(process, None)
+        self.streak_data.pop(app.name, None)
+        return app
+
+    def reconcile(self, applications):
+        """Adopt a config["applications"] edited elsewhere.
+
+        Apps are matched by ID, or by process for entries without one. An app
+        whose edited entry is invalid keeps its previous entry. Returns
+        (removed names, [(old name, new name)], names whose threshold changed).
+        """
+        previous = dict(self.by_id)
+        previous_by_process = dict(self.by_process)
+        self.by_id.clear()
+        self.by_process.clear()
+        self.by_name.clear()
+        self.applications.clear()
+        self.rejected.clear()
+
+        renamed = []
+        changed = []
+        for process, info in applications.items():
+            app_id = info.get("id") if isinstance(info, dict) else None
+            old = (previous.get(app_id) if isinstance(app_id, int) else None) or previous_by_process.get(process)
+            if old is None or old.id in self.by_id:
+                self._load_entry(process, info)
+                continue
+            previous.pop(old.id, None)
+            if isinstance(info, dict):
+                info = dict(info, id=old.id)
+            app = self._load_entry(process, info)
+            if app is None:
+                # Only the edit failed validation: keep tracking the app as it was
+                self.rejected.pop(process, None)
+                if old.name not in self.by_name and old.process not in self.by_process:
+                    self._add(old.id, old.process, old.name, old.min_minutes, old.match)
+                    self.applications[old.process] = old.to_config()
+                continue
+            if app.name != old.name:
+                renamed.append((old.name, app.name))
+                self._move_record(old.name, app.name)
+                app.record = self.streak_data[app.name]
+            if app.min_minutes != old.min_minutes:
+                changed.append(app.name)
+
+        removed = [old.name for old in previous.values() if old.name not in self.by_name]
+        for name in removed:
+            self.streak_data.pop(name, None)
+        return removed, renamed, changed
+
+    def _load(self, applications):
+        self.applications.clear()
+        for process, info in applications.items():
+            self._load_entry(process, info)
+
+    def _load_entry(self, process, info):
+        """Validate one config entry and index it; returns the app or None if rejected."""
+        if not isinstance(info, dict):
+            print(f"Ignoring application {process!r}: its entry is not an object")
+            self.rejected[process] = info
+            return None
+        name = info.get("name")
+        if not isinstance(name, str) or not name:
+            print(f"Ignoring application {process!r}: it has no display name")
+            self.rejected[process] = info
+            return None
+        if name in self.by_name:
+            print(f"Ignoring application {process!r}: {name} is already used by {self.by_name[name].process!r}")
+            self.rejected[process] = info
+            return None
+        min_minutes = info.get("min_minutes")
+        if isinstance(min_minutes, bool) or not isinstance(min_minutes, (int, float)) or min_minutes <= 0:
+            print(f"Ignoring application {process!r}: min_minutes must be a positive number")
+            self.rejected[process] = info
+            return None
+        match = info.get("match")
+        if match is not None and (not isinstance(match, list) or
+                                  not all(isinstance(rule, str) for rule in match)):
+            print(f"Ignoring the match rules of {process!r}: they must be a list of strings")
+            match = None
+            self.config_changed = True
+
+        app_id = info.get("id")
+        if isinstance(app_id, bool) or not isinstance(app_id, int) or app_id in self.by_id:
+            app_id = self._next_id
+            self.config_changed = True
+        app = self._add(app_id, process, name, min_minutes, match)
+        self.applications[process] = app.to_config()
+        return app
+
+    def _add(self, app_id, process, name, min_minutes, match):
+        record = self.streak_data.get(name)
+        if record is None:
+            record = self.streak_data[name] = StreakRecord()
+        app = TrackedApp(app_id, process, name, min_minutes, match, record)
+        self.by_id[app_id] = app
+        self.by_process[process] = app
+        self.by_name[name] = app
+        self._next_id = max(self._next_id, app_id + 1)
+        return app
+
+    def _rename(self, app, name):
+        del self.by_name[app.name]
+        self._move_record(app.name, name)
+        app.name = name
+        app.record = self.streak_data[name]
+        self.by_name[name] = app
+
+    def _move_record(self, old_name, new_name):
+        record = self.streak_data.pop(old_name, None)
+        if record is not None:
+            self.streak_data[new_name] = record
+        elif new_name not in self.streak_data:
+            self.streak_data[new_name] = StreakRecord()
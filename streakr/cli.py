@@ -0,0 +1,295 @@
+import sys
+import json
+import signal
+import argparse
+import datetime
+import threading
+from .engine import CONFIG_FILE, DATA_FILE, PID_FILE, TrackingEngine, read_tracker_pid
+from .storage import open_store, atomic_write_json
+from .usageRollups import UsageRollups, rollups_file
+from .utils import load_config, default_display_name
+
+
+def _load_streak_data(args, config):
+    # Read only: a running tracker may be using, or compacting, the same files
+    store = open_store(args.data, config.get("storage", "json"))
+    try:
+        return store.read()
+    finally:
+        store.close()
+
+
+def cmd_daemon(args):
+    """Run the tracking engine without a GUI until SIGINT/SIGTERM."""
+    activity_monitor = None
+    if args.no_activity_monitor:
+        from .activityMonitor import AlwaysActiveMonitor
+        activity_monitor = AlwaysActiveMonitor()
+
+    engine = TrackingEngine(args.config, args.data, activity_monitor=activity_monitor,
+                            pid_file=args.pid_file)
+    done = threading.Event()
+    errors = []
+
+    def on_error(message):
+        errors.append(message)
+        done.set()
+
+    engine.on_error.append(on_error)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: done.set())
+
+    try:
+        engine.start()
+    except RuntimeError as e:
+        engine.close()
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Tracking {len(engine.config['applications'])} applications (PID {read_tracker_pid(args.pid_file)})")
+
+    # Wake periodically so signals are handled promptly on every platform
+    while not done.wait(1):
+        pass
+    engine.close()
+    for message in errors:
+        print(message, file=sys.stderr)
+    return 1 if errors else 0
+
+
+def cmd_status(args):
+    """Report whether a tracker is running and what it is configured to do."""
+    config = load_config(args.config)
+    pid = read_tracker_pid(args.pid_file)
+    if pid is None:
+        print("Tracker: not running")
+    else:
+        print(f"Tracker: running (PID {pid})")
+    print(f"Applications: {len(config['applications'])}")
+    print(f"Storage: {config.get('storage', 'json')}")
+    print(f"Check interval: {config['check_interval']}s")
+    print(f"Inactivity timeout: {config.get('inactivity_timeout', 120)}s")
+    return 0
+
+
+def cmd_add(args):
+    """Add or update a tracked application in the config file."""
+    if args.minutes <= 0:
+        print("Minutes required must be a positive number.", file=sys.stderr)
+        return 1
+    config = load_config(args.config)
+    display_name = args.name or default_display_name(args.process)
+    for process, app_info in config["applications"].items():
+        # Malformed entries are reported and skipped by the tracker, not here
+        if isinstance(app_info, dict) and app_info.get("name") == display_name and process != args.process:
+            print(f"{display_name} is already the name of {process}.", file=sys.stderr)
+            return 1
+    previous = config["applications"].get(args.process)
+    if not isinstance(previous, dict):
+        previous = {}
+    config["applications"][args.process] = {
+        "name": display_name,
+        "min_minutes": args.minutes
+    }
+    if "id" in previous:
+        # Keeps the streak with the app if its display name changed
+        config["applications"][args.process]["id"] = previous["id"]
+    match = args.match or previous.get("match")
+    if match:
+        config["applications"][args.process]["match"] = match
+    # A running tracker notices the new file and reloads it
+    atomic_write_json(args.config, config)
+    print(f"Added {display_name} to tracked applications.")
+    return 0
+
+
+def cmd_remove(args):
+    """Remove a tracked application and, if no tracker is running, its data."""
+    config = load_config(args.config)
+    app_info = config["applications"].pop(args.process, None)
+    if app_info is None:
+        print(f"{args.process} is not being tracked.", file=sys.stderr)
+        return 1
+    atomic_write_json(args.config, config)
+
+    # A running tracker drops the streak data itself when it reloads the config
+    if read_tracker_pid(args.pid_file) is None:
+        store = open_store(args.data, config.get("storage", "json"))
+        try:
+            streak_data = store.load()
+            if streak_data.pop(app_info["name"], None) is not None:
+                store.save(streak_data, dirty={app_info["name"]})
+        finally:
+            store.close()
+        rollups = UsageRollups(rollups_file(args.data))
+        if rollups.load():
+            rollups.remove(app_info["name"])
+            if rollups.dirty:
+                rollups.save()
+    print(f"Removed {app_info['name']} from tracked applications.")
+    return 0
+
+
+def cmd_stats(args):
+    """Print streaks and today's usage for every tracked application."""
+    config = load_config(args.config)
+    streak_data = _load_streak_data(args, config)
+    today = datetime.date.today().isoformat()
+    if not config["applications"]:
+        print("No applications are being tracked.")
+        return 0
+    for process, app_info in config["applications"].items():
+        data = streak_data.get(app_info["name"], {})
+        usage_date = data.get("usage_date", data.get("last_used_date"))
+        today_usage = round(data.get("today_usage", 0), 1) if usage_date == today else 0
+        print(f"{app_info['name']} ({process})")
+        print(f"  Current Streak: {data.get('current_streak', 0)} days")
+        print(f"  Longest Streak: {data.get('longest_streak', 0)} days")
+        print(f"  Today's Usage: {today_usage}/{app_info['min_minutes']} minutes")
+    return 0
+
+
+def _open_history_store(args, config, writable=False):
+    """Open the history-keeping store; only a `writable` one takes over its files."""
+    store = open_store(args.data, config.get("storage", "json"))
+    if not store.keeps_history:
+        store.close()
+        print("Usage history needs \"storage\": \"sqlite\" or \"columnar\" in the config.", file=sys.stderr)
+        return None
+    if writable:
+        store.load()
+    else:
+        store.read()
+    return store
+
+
+def cmd_summary(args):
+    """Print this week's, month's and year's usage for every tracked application."""
+    config = load_config(args.config)
+    rollups = UsageRollups(rollups_file(args.data))
+    if args.rebuild:
+        if read_tracker_pid(args.pid_file) is not None:
+            print("Stop the running tracker before rebuilding the rollups.", file=sys.stderr)
+            return 1
+        store = _open_history_store(args, config)
+        if store is None:
+            return 1
+        try:
+            rollups.rebuild(store.load_history())
+        finally:
+            store.close()
+        rollups.save()
+    elif not rollups.load():
+        print("No usage rollups yet; they are written by a running tracker.")
+        return 0
+
+    summaries = {app_info["name"]: rollups.summary(app_info["name"])
+                 for app_info in config["applications"].values()}
+    if args.json:
+        print(json.dumps(summaries, indent=4))
+        return 0
+    if not summaries:
+        print("No applications are being tracked.")
+        return 0
+    for app_name, summary in summaries.items():
+        print(app_name)
+        print(f"  This Week: {round(summary['week'])} minutes")
+        print(f"  This Month: {round(summary['month'])} minutes")
+        print(f"  This Year: {round(summary['year'])} minutes")
+    if rollups.since:
+        print(f"Totals only count usage since {rollups.since}; earlier days were not kept.")
+    return 0
+
+
+def cmd_export_history(args):
+    """Write the daily usage history as JSON: {app: {date: minutes}}."""
+    config = load_config(args.config)
+    store = _open_history_store(args, config)
+    if store is None:
+        return 1
+    try:
+        history = store.load_history(start=args.start, end=args.end)
+    finally:
+        store.close()
+    atomic_write_json(args.file, history)
+    print(f"Exported {sum(len(days) for days in history.values())} days of usage to {args.file}.")
+    return 0
+
+
+def cmd_import_history(args):
+    """Merge daily usage from a JSON file written by export-history into the store."""
+    if read_tracker_pid(args.pid_file) is not None:
+        print("Stop the running tracker before importing history.", file=sys.stderr)
+        return 1
+    with open(args.file, 'r') as f:
+        history = json.load(f)
+    config = load_config(args.config)
+    store = _open_history_store(args, config, writable=True)
+    if store is None:
+        return 1
+    try:
+        store.import_history(history)
+        rollups = UsageRollups(rollups_file(args.data))
+        rollups.rebuild(store.load_history())
+        rollups.save()
+    finally:
+        store.close()
+    # Streaks are recomputed from the new history when the tracker next starts
+    print(f"Imported {sum(len(days) for days in history.values())} days of usage from {args.file}.")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="streakr", description="Track daily application usage streaks.")
+    parser.add_argument("--config", default=CONFIG_FILE, help="config file (default: %(default)s)")
+    parser.add_argument("--data", default=DATA_FILE, help="streak data file (default: %(default)s)")
+    parser.add_argument("--pid-file", default=PID_FILE, help="tracker PID file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    daemon = commands.add_parser("daemon", help="run the tracker without a GUI")
+    daemon.add_argument("--no-activity-monitor", action="store_true",
+                        help="count usage without watching keyboard and mouse input")
+    daemon.set_defaults(func=cmd_daemon)
+
+    status = commands.add_parser("status", help="show whether a tracker is running")
+    status.set_defaults(func=cmd_status)
+
+    add = commands.add_parser("add", help="track an application")
+    add.add_argument("process", help="process name to track")
+    add.add_argument("--name", help="display name (derived from the process by default)")
+    add.add_argument("--minutes", type=int, default=15, help="minutes required per day (default: %(default)s)")
+    add.add_argument("--match", action="append", metavar="RULE",
+                     help="extra process rule: a name, a glob, re:REGEX or exe:PATH (repeatable)")
+    add.set_defaults(func=cmd_add)
+
+    remove = commands.add_parser("remove", help="stop tracking an application")
+    remove.add_argument("process", help="process name to remove")
+    remove.set_defaults(func=cmd_remove)
+
+    stats = commands.add_parser("stats", help="show streaks and today's usage")
+    stats.set_defaults(func=cmd_stats)
+
+    summary = commands.add_parser("summary", help="show weekly, monthly and yearly usage")
+    summary.add_argument("--json", action="store_true", help="print the totals as JSON")
+    summary.add_argument("--rebuild", action="store_true",
+                         help="recompute the totals from the usage history first")
+    summary.set_defaults(func=cmd_summary)
+
+    export_history = commands.add_parser("export-history", help="write the daily usage history to JSON")
+    export_history.add_argument("file", help="JSON file to write")
+    export_history.add_argument("--start", help="first date to export (YYYY-MM-DD)")
+    export_history.add_argument("--end", help="last date to export (YYYY-MM-DD)")
+    export_history.set_defaults(func=cmd_export_history)
+
+    import_history = commands.add_parser("import-history", help="merge daily usage history from JSON")
+    import_history.add_argument("file", help="JSON file written by export-history")
+    import_history.set_defaults(func=cmd_import_history)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return 1
+    return args.func(args)
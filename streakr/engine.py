@@ -0,0 +1,727 @@
+import os
+import copy
+import asyncio
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .activityMonitor import create_activity_monitor
+from .appModel import AppModel
+from .processTracker import ProcessTracker
+from .storage import open_store
+from .persistence import WriteBehind
+from .scheduler import TickScheduler
+from .focusTracker import FocusTracker
+from .processMatcher import ProcessMatcher
+from .metrics import TickMetrics
+from .recompute import recompute_streaks, apply_recomputed_streaks
+from .usageRollups import UsageRollups, rollups_file
+from .utils import load_config, load_streak_data, track_all_apps, UsageClock
+
+CONFIG_FILE = "streak_config.json"
+DATA_FILE = "streak_data.json"
+PID_FILE = "streakr.pid"
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_tracker_pid(pid_file=PID_FILE):
+    """Return the PID of a live tracker recorded in `pid_file`, or None."""
+    try:
+        with open(pid_file, 'r') as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    except OSError:
+        return None
+    return pid
+
+
+class TrackingEngine:
+    """Owns config, storage and the tracking loop, independent of any UI.
+
+    The GUI and the headless daemon both drive one of these. Everything runs
+    as tasks on one asyncio event loop in a dedicated thread: the sampling
+    tick, the persistence flush and the publication of snapshots. Config and
+    streak data are only touched on that thread; the public methods hand their
+    work to it and wait for the result, and blocking calls (process scans, disk
+    writes) go to a small bounded executor. Clients read `snapshot`, a copy
+    that is replaced whenever the data changes, and `on_snapshot(snapshot)`
+    and `on_error(message)` callbacks run on the loop thread. Parts of the
+    data that did not change are shared between snapshots, so clients must
+    not modify them.
+
+    Tick stages are timed into `metrics`. Setting `metrics_file` in the config
+    rewrites that file in the Prometheus text format after every active tick,
+    and `metrics_port` serves the same text on http://127.0.0.1:<port>/metrics
+    while this engine is the running tracker.
+
+    Weekly, monthly and yearly usage totals are kept in `rollups`, saved
+    beside the streak data and rebuilt from the usage history when missing.
+
+    While another process's tracker holds the PID file the engine is a
+    `follower`: it never writes streak data or rollups, re-reads them from
+    disk when that tracker saves, and sends app and settings edits through
+    the config file, which the tracker reconciles. The tracker wakes up
+    within WATCH_INTERVAL seconds of a config edit.
+    """
+    EXECUTOR_WORKERS = 2
+    # Seconds the edit and history methods wait for the loop before raising TimeoutError
+    CALL_TIMEOUT = 10
+    # Seconds between checks of the config file and the PID file
+    WATCH_INTERVAL = 2
+
+    def __init__(self, config_file=CONFIG_FILE, data_file=DATA_FILE, activity_monitor=None,
+                 pid_file=PID_FILE):
+        self.config_file = config_file
+        self.data_file = data_file
+        self.pid_file = pid_file
+        self.follower = self._tracker_elsewhere()
+        self._config_mtime = self._stat_config()
+        self.config, self.store, self.streak_data = self._read_files(self.follower)
+        # Validated once here; indexes the apps by ID, process and display name
+        self.apps = AppModel(self.config["applications"], self.streak_data)
+        self.rollups = UsageRollups(rollups_file(self.data_file))
+        rollups_loaded = self.rollups.load()
+        self._files_mtime = self._stat_files()
+
+        # Disk writes are coalesced per flush window and run by the flush task
+        self.persister = self._create_persister()
+        if self.apps.config_changed and not self.follower:
+            self.persister.mark_config(self._config_to_save())
+
+        if activity_monitor is None:
+            # OS idle time where it can be read, keyboard and mouse hooks otherwise
+            activity_monitor = create_activity_monitor(self.config)
+        self.activity_monitor = activity_monitor
+        self.activity_monitor.subscribe(self._on_activity_change)
+
+        # Incremental process cache shared by all ticks, and the compiled
+        # rules that classify its processes into tracked apps
+        self.process_tracker = ProcessTracker()
+        self._rebuild_matcher()
+
+        # Measures the real time between samples for usage accounting
+        self.usage_clock = UsageClock()
+
+        # "focused" mode counts only time an app's window has focus
+        self.focus_tracker = FocusTracker()
+        self._focus_lock = threading.Lock()
+        
+        # Picks the sleep between ticks; woken early on settings and activity changes
+        self.scheduler = TickScheduler(self.config["check_interval"],
+                                       max_interval=self.config.get("max_check_interval", 600))
+
+        # Stage timings and counters for diagnostics and monitoring
+        self.metrics = TickMetrics()
+        self.metrics.add_collector(self._collect_metrics)
+        for counter in ("ticks", "ticks_skipped_inactive", "tick_errors"):
+            self.metrics.inc(counter, 0)
+
+        self.on_snapshot = []
+        self.on_error = []
+        self.running = False
+        # Copies reused by the next snapshot until the config or a record changes;
+        # None in _stale_records means every record is stale
+        self._snapshot_config = None
+        self._snapshot_records = {}
+        self._stale_records = None
+        self.snapshot = self._take_snapshot()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.EXECUTOR_WORKERS,
+                                            thread_name_prefix="streakr-io")
+        self._tick_task = None
+        self._flush_due = None
+        self._flush_lock = None
+        self._reload_lock = None
+        self._changed = None
+        self.loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._run_loop, name="streakr-engine", daemon=True)
+        self._loop_thread.start()
+        self._background_tasks = self._call(self._start_background_tasks)
+
+        if not self.follower:
+            # Repair streaks from the usage history when the store keeps one
+            self._call(self._recompute_streaks, None, True)
+            if not rollups_loaded or self._rollups_incomplete():
+                self._call(self._rebuild_rollups)
+
+    def start(self):
+        """Start tracking.
+
+        Raises RuntimeError if another tracker already runs on these files or
+        the activity monitor cannot start; the engine is then left stopped.
+        """
+        if self.running:
+            return
+        pid = read_tracker_pid(self.pid_file)
+        if pid is not None and pid != os.getpid():
+            raise RuntimeError(f"Another Streakr tracker is already running (PID {pid}).")
+        try:
+            self.activity_monitor.start()
+        except Exception as e:
+            raise RuntimeError(f"Cannot monitor activity: {e}") from e
+        try:
+            with open(self.pid_file, 'w') as f:
+                f.write(str(os.getpid()))
+            if self.follower:
+                # The other tracker has exited since we last looked; take over its latest data
+                self._call(self._reload_data, False)
+            # Only the tracker that owns the PID file serves metrics
+            self._serve_metrics()
+
+            self.running = True
+            self._call(self._start_tracking)
+        except BaseException:
+            self.running = False
+            self.activity_monitor.stop()
+            self.metrics.close()
+            self._release_pid_file()
+            raise
+
+    def stop(self):
+        """Stop tracking and wait for the tick task to be cancelled."""
+        if not self.running:
+            return
+        self.running = False
+        self.activity_monitor.stop()
+        self._call(self._stop_tracking)
+        self.metrics.close()
+        self._release_pid_file()
+
+    def close(self):
+        """Stop tracking, shut the event loop down and flush everything to disk."""
+        self.stop()
+        if not self.loop.is_closed():
+            self._call(self._cancel_background_tasks)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._loop_thread.join()
+            self.loop.close()
+        self._executor.shutdown(wait=True)
+        self.activity_monitor.close()
+        self.process_tracker.close()
+        self.persister.close()
+        if self.rollups.dirty and not self.follower:
+            self.rollups.save()
+        self.metrics.close()
+
+    def add_application(self, process, display_name, minutes):
+        """Track `process` under `display_name` with a daily minimum.
+
+        Like the other edits, raises TimeoutError if the loop is busy for
+        CALL_TIMEOUT seconds; the edit is still applied once it gets to it.
+        """
+        self._call(self._add_application, process, display_name, minutes, timeout=self.CALL_TIMEOUT)
+
+    def remove_application(self, process):
+        """Stop tracking `process` and drop its streak data."""
+        self._call(self._remove_application, process, timeout=self.CALL_TIMEOUT)
+
+    def update_settings(self, check_interval, inactivity_timeout, tracking_mode=None):
+        """Apply and save new timing settings."""
+        self._call(self._update_settings, check_interval, inactivity_timeout, tracking_mode,
+                   timeout=self.CALL_TIMEOUT)
+
+    def usage_history(self):
+        """Return {display name: {iso date: minutes}} of all recorded usage.
+
+        Stores without a history only know each app's last two days. Raises
+        TimeoutError if the loop is busy for CALL_TIMEOUT seconds.
+        """
+        return self._call(self._load_usage_history, timeout=self.CALL_TIMEOUT)
+
+    @property
+    def focus_mode(self):
+        return self.config.get("tracking_mode", "running") == "focused"
+
+    # Everything below runs on the event loop thread
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _call(self, func, *args, timeout=None):
+        """Run `func(*args)` on the event loop thread and return its result.
+
+        Coroutine functions are awaited; called from the loop thread itself
+        they are scheduled as a task instead. With a `timeout`, raises
+        TimeoutError once that many seconds pass without a result; the call
+        still runs when the loop gets to it. start(), stop() and close() wait
+        without one, as the PID file must not change hands mid-flush.
+        """
+        if threading.current_thread() is self._loop_thread:
+            result = func(*args)
+            if asyncio.iscoroutine(result):
+                return self.loop.create_task(result)
+            return result
+
+        async def invoke():
+            result = func(*args)
+            if asyncio.iscoroutine(result):
+                result = await result
+            return result
+        future = asyncio.run_coroutine_threadsafe(invoke(), self.loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.done():
+                raise  # func itself raised it
+            raise TimeoutError(f"Streakr is still busy after {timeout} seconds") from None
+
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call in the executor without stalling the loop."""
+        return await self.loop.run_in_executor(self._executor, func, *args)
+
+    def _start_background_tasks(self):
+        self._flush_due = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._reload_lock = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self._watched_config_mtime = self._config_mtime
+        return [self.loop.create_task(self._flush_loop()),
+                self.loop.create_task(self._publish_loop()),
+                self.loop.create_task(self._watch_loop())]
+
+    async def _cancel_background_tasks(self):
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    async def _start_tracking(self):
+        self.usage_clock.reset()
+        await self._apply_tracking_mode()
+        self._tick_task = self.loop.create_task(self._tracking_loop())
+        self._changed.set()
+
+    async def _stop_tracking(self):
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+            await asyncio.gather(self._tick_task, return_exceptions=True)
+            self._tick_task = None
+        await self._apply_tracking_mode()
+        # Leave nothing pending that another tracker could be overwritten with later
+        await self._flush()
+        self._changed.set()
+
+    def _add_application(self, process, display_name, minutes):
+        previous = self.apps.get(process)
+        previous_minutes = previous.min_minutes if previous else None
+        app, renamed = self.apps.add(process, display_name, minutes)
+        self._mark_config()
+        self._rebuild_matcher()
+
+        if renamed:
+            # The streak and its history move to the new name
+            self.loop.create_task(self._rename_app(renamed, display_name))
+        else:
+            self._mark_streaks([display_name])
+        if previous_minutes not in (None, minutes):
+            # A new threshold changes which past days count towards the streak
+            self.loop.create_task(self._recompute_streaks([display_name]))
+        self.scheduler.wake()
+
+    def _remove_application(self, process):
+        app = self.apps.remove(process)
+        if app is None:
+            return
+        self._mark_config()
+        self._rebuild_matcher()
+        self._mark_streaks([app.name])
+        self.rollups.remove(app.name)
+
+    async def _rename_app(self, old_name, new_name):
+        """Carry the stored history and rollups of a renamed app over to its new name."""
+        if self.follower:
+            return  # the tracker renames its own data when it reconciles the config
+        await self._run_blocking(self.store.rename, old_name, new_name)
+        self.rollups.rename(old_name, new_name)
+        self._mark_streaks([old_name, new_name])
+
+    async def _update_settings(self, check_interval, inactivity_timeout, tracking_mode):
+        self.config["check_interval"] = check_interval
+        self.config["inactivity_timeout"] = inactivity_timeout
+        if tracking_mode is not None:
+            self.config["tracking_mode"] = tracking_mode
+        self._mark_config()
+        self.activity_monitor.set_inactivity_timeout(inactivity_timeout)
+        self.scheduler.base_interval = check_interval
+        self.scheduler.wake()
+        await self._apply_tracking_mode()
+
+    async def _apply_tracking_mode(self):
+        """Follow window focus exactly while tracking in focused mode.
+
+        Starting opens an X display and stopping joins a thread, so this
+        runs in the executor.
+        """
+        await self._run_blocking(self._follow_focus)
+
+    def _follow_focus(self):
+        # Runs one at a time and reads the state when it runs, so the last call wins
+        with self._focus_lock:
+            if self.running and self.focus_mode:
+                self.focus_tracker.start()
+            else:
+                self.focus_tracker.stop()
+
+    def _mark_config(self):
+        self._snapshot_config = None
+        self.persister.mark_config(self._config_to_save())
+
+    def _config_to_save(self):
+        """The config with the entries AppModel rejected put back, so saving never drops them."""
+        return dict(self.config, applications=self.apps.config_entries())
+        self._flush_due.set()
+        self._changed.set()
+
+    def _mark_streaks(self, apps=None):
+        if apps is None:
+            self._stale_records = None
+        elif self._stale_records is not None:
+            self._stale_records.update(apps)
+        if self.follower:
+            # The tracker owns the streak data; ours is re-read once it saves
+            self._changed.set()
+            return
+        self.persister.mark_streaks(self.streak_data, apps)
+        self._flush_due.set()
+        self._changed.set()
+
+    def _take_snapshot(self):
+        """Copy the state clients may display.
+
+        Only the config and records that changed since the last snapshot are
+        copied again; the rest is shared with it.
+        """
+        today = datetime.date.today().isoformat()
+        if self._snapshot_config is None:
+            self._snapshot_config = copy.deepcopy(self.config)
+        stale = self._stale_records
+        records = {}
+        for app, record in self.streak_data.items():
+            copied = self._snapshot_records.get(app)
+            if copied is None or stale is None or app in stale:
+                copied = dict(record)
+            records[app] = copied
+        self._snapshot_records = records
+        self._stale_records = set()
+        return {
+            "config": self._snapshot_config,
+            "streak_data": records,
+            "rollups": {app: self.rollups.summary(app, today) for app in self.streak_data},
+            "rollups_since": self.rollups.since,
+            "running": self.running,
+            "follower": self.follower,
+        }
+
+    def _collect_metrics(self):
+        """Counters owned by other components, read at export time."""
+        return {
+            "activity_events": self.activity_monitor.stats()["events_received"],
+            "write_bytes": self.persister.bytes_written + self.rollups.bytes_written,
+            "flushes": self.persister.flushes,
+        }
+
+    def _on_activity_change(self, is_active):
+        """Called from the monitor's threads on active/inactive transitions."""
+        try:
+            self.loop.call_soon_threadsafe(self._activity_changed, is_active)
+        except RuntimeError:
+            pass  # the loop has been closed
+
+    def _read_activity(self):
+        """Whether the user is active; an IdleTimeMonitor asks the OS, so run it in the executor."""
+        return self.activity_monitor.is_active
+
+    def _activity_changed(self, is_active):
+        if is_active:
+            # Time spent inactive is never credited as usage
+            self.usage_clock.resume()
+        self.focus_tracker.set_paused(not is_active)
+        self.scheduler.wake()
+
+    def _stat_config(self):
+        return _mtime(self.config_file)
+
+    def _stat_files(self):
+        """Modification times of the files a tracker writes."""
+        return tuple(_mtime(path) for path in (self.config_file, self.rollups.path, *self.store.data_files))
+
+    def _tracker_elsewhere(self):
+        pid = read_tracker_pid(self.pid_file)
+        return pid is not None and pid != os.getpid()
+
+    def _read_files(self, follower):
+        """Read the config and open the store; returns (config, store, streak data).
+
+        A follower reads the store without taking over its files.
+        """
+        config = load_config(self.config_file)
+        store = open_store(self.data_file, config.get("storage", "json"))
+        streak_data = store.read() if follower else load_streak_data(self.data_file, store)
+        return config, store, streak_data
+
+    def _create_persister(self):
+        return WriteBehind(self.store, self.config_file, self.streak_data,
+                           flush_window=self.config.get("flush_window", 30),
+                           fsync=self.config.get("fsync", "shutdown"),
+                           background=False)
+
+    async def _reload_data(self, follower):
+        """Replace the config, streak data and rollups held in memory with what is on disk."""
+        async with self._reload_lock:
+            if not (follower and self.running):
+                await self._load_data(follower)
+
+    async def _load_data(self, follower):
+        await self._run_blocking(self.persister.close)
+        self._config_mtime = self._stat_config()
+        self._files_mtime = self._stat_files()
+        config, store, streak_data = await self._run_blocking(self._read_files, follower)
+        rollups_loaded = await self._run_blocking(self.rollups.load)
+
+        # Update in place so every holder of these dicts sees the new values
+        self.follower = follower
+        self.config.clear()
+        self.config.update(config)
+        self.streak_data.clear()
+        self.streak_data.update(streak_data)
+        self._snapshot_config = None
+        self._stale_records = None
+        self.store = store
+        self.apps = AppModel(self.config["applications"], self.streak_data)
+        self.persister = self._create_persister()
+        if self.apps.config_changed and not follower:
+            self._mark_config()
+        self._rebuild_matcher()
+        self.scheduler.base_interval = self.config["check_interval"]
+        self.activity_monitor.set_inactivity_timeout(self.config.get("inactivity_timeout", 120))
+        self._changed.set()
+
+        if not follower:
+            await self._recompute_streaks(None, True)
+            if not rollups_loaded or self._rollups_incomplete():
+                await self._rebuild_rollups()
+
+    async def _reload_config_if_changed(self):
+        """Pick up edits made by another process, such as `streakr add`."""
+        mtime = self._stat_config()
+        if mtime in (self._config_mtime, self.persister.config_mtime):
+            return
+        if self.persister.config_pending:
+            # Our own unsaved edits win; look again once they are written
+            return
+        config = await self._run_blocking(load_config, self.config_file)
+        if self.persister.config_pending:
+            return
+        self._config_mtime = mtime
+        self.apps.config_changed = False
+        removed, renamed, edited = self.apps.reconcile(config.pop("applications", {}))
+
+        # Update in place so every holder of self.config sees the new values
+        applications = self.config["applications"]
+        self.config.clear()
+        self.config.update(config, applications=applications)
+        self._snapshot_config = None
+        if self.apps.config_changed:
+            self._mark_config()
+        self._rebuild_matcher()
+        self.scheduler.base_interval = self.config["check_interval"]
+        self.activity_monitor.set_inactivity_timeout(self.config.get("inactivity_timeout", 120))
+        for display_name in removed:
+            self.rollups.remove(display_name)
+        if removed:
+            self._mark_streaks(removed)
+        for old_name, new_name in renamed:
+            await self._rename_app(old_name, new_name)
+        await self._apply_tracking_mode()
+        self._changed.set()
+
+        if edited:
+            await self._recompute_streaks(edited)
+
+    def _rebuild_matcher(self):
+        """Recompile the match rules after the tracked applications changed."""
+        self.matcher = ProcessMatcher(self.config["applications"])
+        self.process_tracker.set_resolve_exe(self.matcher.needs_exe)
+
+    def _merge_unsaved_usage(self, history):
+        """Add the usage held in memory but maybe not yet flushed to `history`."""
+        for app_name, record in self.streak_data.items():
+            days = {record.get("previous_date"): record.get("previous_usage"),
+                    record.get("usage_date", record.get("last_used_date")): record.get("today_usage")}
+            for date, minutes in days.items():
+                if date and minutes:
+                    history.setdefault(app_name, {})[date] = minutes
+        return history
+
+    async def _recompute_streaks(self, apps=None, keep_longest=False):
+        """Re-derive streaks of `apps` (all by default) from the store's usage history."""
+        if not self.store.keeps_history or self.follower:
+            return
+        history = await self._run_blocking(self.store.load_history)
+        self._merge_unsaved_usage(history)
+        thresholds = self.apps.thresholds()
+        if apps is not None:
+            thresholds = {app_name: thresholds[app_name] for app_name in apps if app_name in thresholds}
+        with self.metrics.time("recompute"):
+            recomputed = await self._run_blocking(recompute_streaks, history, thresholds)
+        changed = apply_recomputed_streaks(self.streak_data, recomputed, keep_longest)
+        if changed:
+            self._mark_streaks(changed)
+
+    async def _load_usage_history(self):
+        history = await self._run_blocking(self.store.load_history) if self.store.keeps_history else {}
+        return self._merge_unsaved_usage(history)
+
+    def _rollups_incomplete(self):
+        """True when the rollups were rebuilt from partial history that the store now keeps in full."""
+        return self.rollups.since is not None and self.store.keeps_history
+
+    async def _rebuild_rollups(self):
+        """Re-derive the usage rollups from the usage history and save them.
+
+        Stores without a history only know the last two days, so totals
+        rebuilt from them are marked as partial rather than passed off as complete.
+        """
+        self.rollups.rebuild(await self._load_usage_history(), complete=self.store.keeps_history)
+        await self._flush()
+        self._changed.set()
+
+    def _serve_metrics(self):
+        port = self.config.get("metrics_port")
+        if not port:
+            return
+        try:
+            self.metrics.serve(port)
+        except OSError as e:
+            print(f"Not serving metrics on port {port}: {e}")
+
+    def _release_pid_file(self):
+        if read_tracker_pid(self.pid_file) == os.getpid():
+            try:
+                os.remove(self.pid_file)
+            except OSError:
+                pass
+
+    async def _tracking_loop(self):
+        """Sampling task: one tick per scheduler interval until cancelled."""
+        was_active = True
+        while True:
+            try:
+                await self._reload_config_if_changed()
+                # Read once per tick, off the loop: it may query the OS
+                active = await self._run_blocking(self._read_activity)
+                snapshot = None
+                if active:
+                    self.metrics.inc("ticks")
+                    if self.focus_mode and self.focus_tracker.available:
+                        # Focus events already measured the time; no process scan needed
+                        focus_time = self.matcher.group_times(self.focus_tracker.drain())
+                        snapshot = self.matcher.running_apps({self.focus_tracker.current})
+                        with self.metrics.time("accounting"):
+                            changed = track_all_apps(self.config, self.streak_data, snapshot,
+                                                     active, focus_time=focus_time,
+                                                     rollups=self.rollups)
+                    else:
+                        # One process scan per tick, shared by every tracked app
+                        with self.metrics.time("scan"):
+                            processes = await self._run_blocking(self.process_tracker.snapshot)
+                            snapshot = self.matcher.running_apps(processes)
+                        self.usage_clock.max_gap = 2 * self.scheduler.last_interval
+                        with self.metrics.time("accounting"):
+                            changed = track_all_apps(self.config, self.streak_data, snapshot,
+                                                     active, self.usage_clock,
+                                                     rollups=self.rollups)
+                    if changed:
+                        self._mark_streaks(changed)
+                    else:
+                        self._changed.set()  # republish for the diagnostics
+                else:
+                    self.metrics.inc("ticks_skipped_inactive")
+                if self.config.get("metrics_file") and (active or was_active):
+                    # Inactive ticks only bump a counter; the file is written once when they start
+                    await self._run_blocking(self.metrics.write_textfile, self.config["metrics_file"])
+                was_active = active
+
+                # Sleep until the next tick, or until woken by settings/activity
+                interval = self.scheduler.next_interval(self.config, self.streak_data, snapshot, active)
+                await self.scheduler.wait(interval)
+            except Exception as e:
+                message = f"Error: {str(e)}"
+                self.metrics.inc("tick_errors")
+                self.running = False
+                self._tick_task = None
+                self.activity_monitor.stop()
+                await self._apply_tracking_mode()
+                self._release_pid_file()
+                self._changed.set()
+                for callback in self.on_error:
+                    callback(message)
+                return
+
+    async def _flush_loop(self):
+        """Persistence task: write pending marks once their flush window has passed.
+
+        Edits made while not tracking are written right away.
+        """
+        while True:
+            delay = self.persister.flush_delay()
+            if delay is None:
+                await self._flush_due.wait()
+                self._flush_due.clear()
+                continue
+            if self.running:
+                await asyncio.sleep(delay)
+            await self._flush()
+
+    async def _flush(self):
+        async with self._flush_lock:
+            with self.metrics.time("persistence"):
+                await self._run_blocking(self.persister.flush)
+                if self.rollups.dirty and not self.follower:
+                    await self._run_blocking(self.rollups.save, self.rollups.snapshot())
+
+    async def _watch_loop(self):
+        """Watch task: notice config edits and a tracker running in another process.
+
+        While tracking, a config edit wakes the tick, which reloads it. While
+        not, the engine follows another process's tracker, re-reading its
+        files whenever they change, or picks up config edits itself.
+        """
+        while True:
+            await asyncio.sleep(self.WATCH_INTERVAL)
+            if self.running:
+                mtime = self._stat_config()
+                if mtime != self._watched_config_mtime:
+                    self._watched_config_mtime = mtime
+                    if mtime not in (self._config_mtime, self.persister.config_mtime):
+                        self.scheduler.wake()
+                continue
+            follower = self._tracker_elsewhere()
+            if follower != self.follower or (follower and self._stat_files() != self._files_mtime):
+                await self._reload_data(follower)
+            elif not follower:
+                await self._reload_config_if_changed()
+
+    async def _publish_loop(self):
+        """Publication task: hand clients a fresh snapshot after each change.
+
+        Changes made while callbacks run are coalesced into the next snapshot.
+        """
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            self.snapshot = self._take_snapshot()
+            for callback in self.on_snapshot:
+                callback(self.snapshot)
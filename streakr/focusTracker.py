@@ -0,0 +1,216 @@
+import os
+import sys
+import time
+import select
+import threading
+
+
+class FocusTracker:
+    """Attributes elapsed time to the application whose window has focus.
+
+    On Linux it listens for PropertyNotify events on the root window's
+    _NET_ACTIVE_WINDOW over a persistent X connection, so nothing runs
+    between focus changes. Elsewhere, or without an X server, the foreground
+    window is polled every `poll_interval` seconds. Application names match
+    get_active_windows(): WM_CLASS on Linux, the owning process name on
+    Windows and the window owner on macOS. When focus cannot be followed at
+    all, `available` is False and the caller should account another way.
+    """
+    # Entries kept by the PID (Windows) and WM_CLASS (X) name caches
+    CACHE_LIMIT = 256
+
+    def __init__(self, poll_interval=1.0):
+        self.poll_interval = poll_interval
+        self.mode = None
+        self.focus_changes = 0
+        self.current = None
+        self._since = time.monotonic()
+        self._totals = {}  # app name -> focused seconds since the last drain()
+        self._paused = False
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._wake_r = self._wake_w = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start following focus changes in a background thread."""
+        if self._running:
+            return
+        self._running = True
+        self._stop.clear()
+        with self._lock:
+            self._since = time.monotonic()
+
+        target = self._poll
+        self.mode = "polling"
+        if sys.platform.startswith("linux"):
+            display = self._open_x_display()
+            if display is None:
+                # No X server to ask; there is nothing worth polling either
+                self.mode = "unavailable"
+                self._running = False
+                print("Cannot follow window focus without an X display; counting running time instead")
+                return
+            self._wake_r, self._wake_w = os.pipe()
+            target = lambda: self._watch_x_events(display)
+            self.mode = "events"
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    @property
+    def available(self):
+        """False once start() found no way to follow focus."""
+        return self.mode != "unavailable"
+
+    def stop(self):
+        """Stop following focus and account the time up to now."""
+        if not self._running:
+            return
+        self._running = False
+        self._stop.set()
+        if self._wake_w is not None:
+            os.write(self._wake_w, b"x")
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for fd in (self._wake_r, self._wake_w):
+            if fd is not None:
+                os.close(fd)
+        self._wake_r = self._wake_w = None
+        self._focus_changed(None)
+
+    def set_paused(self, paused):
+        """Stop (or resume) accumulating time, e.g. while the user is inactive."""
+        with self._lock:
+            self._accrue(time.monotonic())
+            self._paused = paused
+
+    def drain(self):
+        """Return {app name: focused seconds} since the previous drain and reset."""
+        with self._lock:
+            self._accrue(time.monotonic())
+            totals, self._totals = self._totals, {}
+        return totals
+
+    def _accrue(self, now):
+        """Credit the focused app up to `now` (lock held)."""
+        if self.current and not self._paused:
+            self._totals[self.current] = self._totals.get(self.current, 0) + now - self._since
+        self._since = now
+
+    def _focus_changed(self, app_name):
+        with self._lock:
+            if app_name == self.current:
+                return
+            self._accrue(time.monotonic())
+            self.current = app_name
+            self.focus_changes += 1
+
+    def _open_x_display(self):
+        try:
+            import Xlib.display
+        except ImportError:
+            print("Please install python-xlib for focus tracking on Linux")
+            return None
+        try:
+            return Xlib.display.Display()
+        except Exception:
+            return None
+
+    def _watch_x_events(self, display):
+        from Xlib import X
+
+        root = display.screen().root
+        net_active_window = display.intern_atom('_NET_ACTIVE_WINDOW')
+        net_client_list = display.intern_atom('_NET_CLIENT_LIST')
+        root.change_attributes(event_mask=X.PropertyChangeMask)
+        # WM_CLASS per window ID, kept only for windows still in _NET_CLIENT_LIST
+        window_classes = {}
+        clients = set()
+
+        def refresh_clients():
+            prop = root.get_full_property(net_client_list, X.AnyPropertyType)
+            clients.clear()
+            clients.update(prop.value if prop else ())
+            for window_id in list(window_classes):
+                if window_id not in clients:
+                    del window_classes[window_id]
+
+        def focused_class():
+            prop = root.get_full_property(net_active_window, X.AnyPropertyType)
+            window_id = prop.value[0] if prop and len(prop.value) else 0
+            if not window_id:
+                return None
+            # A window the client list has not listed yet may reuse a closed one's ID
+            if window_id not in window_classes or window_id not in clients:
+                if len(window_classes) >= self.CACHE_LIMIT:
+                    window_classes.clear()
+                try:
+                    wmclass = display.create_resource_object('window', window_id).get_wm_class()
+                    window_classes[window_id] = wmclass[1] if wmclass else None
+                except Exception:
+                    return None
+            return window_classes[window_id]
+
+        try:
+            refresh_clients()
+            self._focus_changed(focused_class())
+            while self._running:
+                changed = False
+                while display.pending_events():
+                    event = display.next_event()
+                    if event.type != X.PropertyNotify:
+                        continue
+                    if event.atom == net_client_list:
+                        refresh_clients()
+                    elif event.atom == net_active_window:
+                        changed = True
+                if changed:
+                    self._focus_changed(focused_class())
+                    continue
+                
+                # Block until the X server or stop() has something for us
+                readable, _, _ = select.select([display.fileno(), self._wake_r], [], [])
+                if self._wake_r in readable:
+                    break
+        finally:
+            display.close()
+
+    def _poll(self):
+        pid_names = {}
+        while self._running:
+            try:
+                self._focus_changed(self._foreground_app(pid_names))
+            except Exception:
+                self._focus_changed(None)
+            self._stop.wait(self.poll_interval)
+
+    def _foreground_app(self, pid_names):
+        if sys.platform == "win32":
+            import psutil
+            import win32gui
+            import win32process
+
+            hwnd = win32gui.GetForegroundWindow()
+            if not hwnd:
+                return None
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            process = psutil.Process(pid)
+            # Keyed by creation time too, so a recycled PID is looked up again
+            key = (pid, process.create_time())
+            if key not in pid_names:
+                if len(pid_names) >= self.CACHE_LIMIT:
+                    pid_names.clear()
+                pid_names[key] = process.name()
+            return pid_names[key]
+        elif sys.platform == "darwin":
+            from Quartz import (CGWindowListCopyWindowInfo, kCGWindowListOptionOnScreenOnly,
+                                kCGNullWindowID, kCGWindowOwnerName, kCGWindowLayer)
+
+            # On-screen windows come front to back; the first normal-layer one has focus
+            for window in CGWindowListCopyWindowInfo(kCGWindowListOptionOnScreenOnly, kCGNullWindowID):
+                if window.get(kCGWindowLayer) == 0:
+                    return window.get(kCGWindowOwnerName) or None
+            return None
+        return None
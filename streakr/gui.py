@@ -1,13 +1,11 @@
-import os
-import json
 import datetime
-import time
-import threading
 import tkinter as tk
 from tkinter import PhotoImage, ttk, messagebox
-from .activityMonitor import ActivityMonitor
-from .utils import (load_config, save_config, load_streak_data, 
-                   save_streak_data, get_active_windows, track_app_usage)
+from .engine import TrackingEngine
+from .updateQueue import UpdateQueue
+from .usageHeatmap import UsageHeatmap
+from .utils import default_display_name
+from .windowEnumerator import get_window_enumerator
 
 class StreakTrackerGUI:
     def __init__(self, root):
@@ -18,20 +16,39 @@ class StreakTrackerGUI:
         icon = PhotoImage(file="assets/icon.png")
         self.root.iconphoto(True, icon)
         
-        self.config_file = "streak_config.json"
-        self.data_file = "streak_data.json"
-        self.config = load_config(self.config_file)
-        self.streak_data = load_streak_data(self.data_file)
-        
-        # Initialize activity monitor with 2-minute timeout
-        self.activity_monitor = ActivityMonitor(inactivity_timeout=120)
+        # Tracking, config and storage live in the engine; the GUI is a client
+        # that renders the snapshots the engine publishes after each change.
+        # While the daemon tracks, the engine only follows its files.
+        self.engine = TrackingEngine()
+        self.snapshot = self.engine.snapshot
+        self.following = False
+
+        # Other threads never call Tk; their updates are queued by key and
+        # applied by the Tk thread, the latest one per key, redraws rate-limited
+        self.ui_updates = UpdateQueue(self.root)
+        self.ui_updates.limit("snapshot", 250)
+        self.engine.metrics.add_collector(self.ui_updates.stats)
+        # Follows the monitor's transitions; reading is_active may query the OS
+        self.user_active = True
+        self.activity_monitor = self.engine.activity_monitor
+        self.activity_monitor.subscribe(self._on_activity_change)
+        self.engine.on_snapshot.append(self._on_engine_snapshot)
+        self.engine.on_error.append(self._on_engine_error)
+        
+        # Daily usage behind the heatmaps; reloaded by Refresh Stats
+        try:
+            self.usage_history = self.engine.usage_history()
+        except TimeoutError:
+            self.usage_history = {}
         
-        self.running = False
-        self.thread = None
+        # Window list for the process dropdown, refreshed in the background
+        self.window_enumerator = get_window_enumerator()
         
         self._create_gui()
         self._populate_process_dropdown()
         self._update_display()
+        self._update_tracker_status()
+        self.ui_updates.start()
 
     def _create_gui(self):
         """Create the GUI components."""
@@ -137,6 +154,7 @@ class StreakTrackerGUI:
         self.tracked_tree.bind("<Button-1>", self._handle_tree_click)
         
         # Update tracked apps list
+        self.shown_applications = None
         self._update_tracked_apps()
     def _build_stats_tab(self):
         """Build the Stats tab UI."""
@@ -152,6 +170,13 @@ class StreakTrackerGUI:
         self.stats_content_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
         
         canvas.create_window((0, 0), window=self.stats_content_frame, anchor="nw")
+        
+        # Current date, followed by one persistent widget group per app
+        self.date_var = tk.StringVar()
+        date_label = ttk.Label(self.stats_content_frame, textvariable=self.date_var,
+                               font=("Arial", 12, "bold"))
+        date_label.pack(anchor=tk.W, padx=10, pady=(10, 20))
+        self.stat_widgets = {}
         canvas.configure(yscrollcommand=scrollbar.set)
         
         # Pack the canvas and scrollbar
@@ -159,7 +184,7 @@ class StreakTrackerGUI:
         scrollbar.pack(side="right", fill="y")
         
         # Add refresh button
-        refresh_stats_button = ttk.Button(self.stats_frame, text="Refresh Stats", command=self._update_display)
+        refresh_stats_button = ttk.Button(self.stats_frame, text="Refresh Stats", command=self._refresh_stats)
         refresh_stats_button.pack(side=tk.BOTTOM, pady=10)
 
     def _build_settings_tab(self):
@@ -169,39 +194,62 @@ class StreakTrackerGUI:
         
         # Check interval setting
         ttk.Label(settings_frame, text="Check Interval (seconds):").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
-        self.check_interval_var = tk.StringVar(value=str(self.config["check_interval"]))
+        self.check_interval_var = tk.StringVar(value=str(self.snapshot["config"]["check_interval"]))
         check_interval_entry = ttk.Entry(settings_frame, textvariable=self.check_interval_var, width=10)
         check_interval_entry.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
         
         # Inactivity timeout setting
         ttk.Label(settings_frame, text="Inactivity Timeout (seconds):").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
-        self.inactivity_timeout_var = tk.StringVar(value=str(self.config.get("inactivity_timeout", 120)))
+        self.inactivity_timeout_var = tk.StringVar(value=str(self.snapshot["config"].get("inactivity_timeout", 120)))
         inactivity_timeout_entry = ttk.Entry(settings_frame, textvariable=self.inactivity_timeout_var, width=10)
         inactivity_timeout_entry.grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
         
+        # Tracking mode setting
+        ttk.Label(settings_frame, text="Tracking Mode:").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+        self.tracking_mode_var = tk.StringVar(value=self.snapshot["config"].get("tracking_mode", "running"))
+        tracking_mode_dropdown = ttk.Combobox(settings_frame, textvariable=self.tracking_mode_var,
+                                              values=("running", "focused"), state="readonly", width=10)
+        tracking_mode_dropdown.grid(row=2, column=1, padx=5, pady=5, sticky=tk.W)
+        
         # Settings explanation
         explanation = ttk.Label(settings_frame, text=(
             "Check Interval: How often to check if applications are running (in seconds).\n"
             "\n"
-            "Inactivity Timeout: Time without keyboard or mouse activity before pausing tracking (in seconds)."
+            "Inactivity Timeout: Time without keyboard or mouse activity before pausing tracking (in seconds).\n"
+            "\n"
+            "Tracking Mode: \"running\" counts time while an application is open; "
+            "\"focused\" counts only time its window has focus."
         ), wraplength=500, justify=tk.LEFT)
-        explanation.grid(row=2, column=0, columnspan=2, padx=5, pady=10, sticky=tk.W)
+        explanation.grid(row=3, column=0, columnspan=2, padx=5, pady=10, sticky=tk.W)
         
         # Save settings button
         save_button = ttk.Button(settings_frame, text="Save Settings", command=self._save_settings)
-        save_button.grid(row=3, column=0, columnspan=2, padx=5, pady=10)
+        save_button.grid(row=4, column=0, columnspan=2, padx=5, pady=10)
+        
+        # Tick stage timings and counters from the engine
+        diagnostics_frame = ttk.LabelFrame(settings_frame, text="Diagnostics")
+        diagnostics_frame.grid(row=5, column=0, columnspan=2, padx=5, pady=10, sticky=tk.W+tk.E)
+        self.diagnostics_var = tk.StringVar()
+        ttk.Label(diagnostics_frame, textvariable=self.diagnostics_var, font=("Courier", 9),
+                  justify=tk.LEFT).pack(anchor=tk.W, padx=5, pady=5)
+        self._update_diagnostics()
 
     def _populate_process_dropdown(self):
-        """Populate the process dropdown with active windows."""
-        active_windows = get_active_windows()
+        """Populate the process dropdown with active windows.
+        
+        Shows the cached window list right away and fills in the refreshed
+        one when the background enumeration finishes.
+        """
+        def on_refresh(windows):
+            self.ui_updates.put("process_list", self.process_dropdown.configure, {"values": windows})
+        
+        active_windows = self.window_enumerator.get(on_refresh=on_refresh, force=True)
         self.process_dropdown['values'] = active_windows
         
         def update_display_name(event):
             process = self.process_var.get()
             if process:
-                base_name = os.path.splitext(process)[0]
-                display_name = " ".join(word.capitalize() for word in base_name.split())
-                self.display_name_var.set(display_name)
+                self.display_name_var.set(default_display_name(process))
         
         self.process_dropdown.bind("<<ComboboxSelected>>", update_display_name)
 
@@ -222,25 +270,14 @@ class StreakTrackerGUI:
             messagebox.showerror("Missing Information", "Please fill in all fields.")
             return
         
-        # Add to config
-        self.config["applications"][process] = {
-            "name": display_name,
-            "min_minutes": minutes
-        }
-        save_config(self.config_file, self.config)
-        
-        # Initialize streak data
-        if display_name not in self.streak_data:
-            self.streak_data[display_name] = {
-                "current_streak": 0,
-                "longest_streak": 0,
-                "last_used_date": None,
-                "today_usage": 0,
-                "streak_date": None
-            }
-            save_streak_data(self.data_file, self.streak_data)
-        
-        self._update_tracked_apps()
+        try:
+            self.engine.add_application(process, display_name, minutes)
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", str(e))
+            return
+        except TimeoutError as e:
+            messagebox.showwarning("Still Working", f"{e}; {display_name} will be added once it catches up.")
+            return
         
         # Clear form
         self.process_var.set("")
@@ -251,10 +288,15 @@ class StreakTrackerGUI:
 
     def _update_tracked_apps(self):
         """Update the list of tracked applications."""
+        applications = self.snapshot["config"]["applications"]
+        if applications == self.shown_applications:
+            return
+        self.shown_applications = applications
+        
         for item in self.tracked_tree.get_children():
             self.tracked_tree.delete(item)
         
-        for process, app_info in self.config["applications"].items():
+        for process, app_info in applications.items():
             self.tracked_tree.insert("", "end", values=(
                 app_info["name"],
                 process,
@@ -277,146 +319,234 @@ class StreakTrackerGUI:
     def _remove_application(self, process_name):
         """Remove an application from tracking."""
         if messagebox.askyesno("Confirm Deletion", "Are you sure you want to remove this application?"):
-            display_name = self.config["applications"][process_name]["name"]
-            
-            del self.config["applications"][process_name]
-            save_config(self.config_file, self.config)
-            
-            if display_name in self.streak_data:
-                del self.streak_data[display_name]
-                save_streak_data(self.data_file, self.streak_data)
-            
-            self._update_tracked_apps()
-            self._update_display()
+            try:
+                self.engine.remove_application(process_name)
+            except TimeoutError as e:
+                messagebox.showwarning("Still Working", f"{e}; the application will be removed once it catches up.")
+
+    @property
+    def running(self):
+        return self.engine.running
 
     def _toggle_tracking(self):
         """Start or stop tracking."""
         if not self.running:
-            if not self.config["applications"]:
+            if not self.snapshot["config"]["applications"]:
                 messagebox.showwarning("No Applications", "Please add at least one application to track.")
                 return
             
-            self.running = True
+            try:
+                self.engine.start()
+            except RuntimeError as e:
+                messagebox.showerror("Cannot Start Tracking", str(e))
+                return
             self.tracking_status.set("Stop Tracking")
-            self.activity_monitor.start()
-            
-            self.thread = threading.Thread(target=self._tracking_loop, daemon=True)
-            self.thread.start()
-            
+            self.user_active = True
+            self._update_activity_indicator()
             self.status_var.set("Tracking active")
         else:
-            self.running = False
+            self.engine.stop()
             self.tracking_status.set("Start Tracking")
-            self.activity_monitor.stop()
-            if self.thread:
-                self.thread.join(timeout=1.0)
+            self._update_activity_indicator()
             self.status_var.set("Tracking stopped")
 
+    def _on_engine_snapshot(self, snapshot):
+        """Called on the engine's loop thread whenever its data changed."""
+        self.ui_updates.put("snapshot", self._show_snapshot, snapshot)
+
+    def _show_snapshot(self, snapshot):
+        """Render a snapshot published by the engine."""
+        with self.engine.metrics.time("ui"):
+            self.snapshot = snapshot
+            self._update_tracked_apps()
+            self._update_display()
+        self._update_tracker_status()
+        self._update_diagnostics()
+
+    def _update_tracker_status(self):
+        """Say in the status bar when another Streakr process is doing the tracking."""
+        following = self.snapshot.get("follower", False)
+        if following == self.following:
+            return
+        self.following = following
+        if following:
+            self.status_var.set("Tracking runs in another Streakr process; showing its data")
+        else:
+            self.status_var.set("Ready")
+
+    def _refresh_stats(self):
+        """Reload the usage history behind the heatmaps and redraw the Statistics tab."""
+        try:
+            self.usage_history = self.engine.usage_history()
+        except TimeoutError as e:
+            self.status_var.set(f"{e}; try Refresh Stats again")
+            return
+        for app_name, widgets in self.stat_widgets.items():
+            widgets["heatmap"].set_history(self.usage_history.get(app_name, {}))
+        self._show_snapshot(self.engine.snapshot)
+
+    def _update_diagnostics(self):
+        """Show recent tick stage timings and counters on the Settings tab."""
+        summary = self.engine.metrics.summary()
+        lines = []
+        for stage, timing in summary["stages"].items():
+            if timing["count"]:
+                lines.append(f"{stage:<12} p50 {timing['p50_ms']:>8.2f} ms  "
+                             f"p95 {timing['p95_ms']:>8.2f} ms  ({timing['count']})")
+            else:
+                lines.append(f"{stage:<12} no samples yet")
+        counters = summary["counters"]
+        lines.append(f"Ticks: {counters.get('ticks', 0)}, skipped while inactive: "
+                     f"{counters.get('ticks_skipped_inactive', 0)}, errors: {counters.get('tick_errors', 0)}")
+        lines.append(f"Activity events: {counters.get('activity_events', 0)}, written: "
+                     f"{counters.get('write_bytes', 0) / 1024:.1f} KiB in {counters.get('flushes', 0)} flushes")
+        lines.append(f"UI updates: {counters.get('ui_updates_applied', 0)} applied, "
+                     f"{counters.get('ui_updates_coalesced', 0)} coalesced")
+        self.diagnostics_var.set("\n".join(lines))
+
+    def _on_activity_change(self, is_active):
+        """Called from the monitor's threads on active/inactive transitions."""
+        self.ui_updates.put("activity", self._show_activity, is_active)
+
+    def _show_activity(self, is_active):
+        self.user_active = is_active
+        self._update_activity_indicator()
+
+    def _on_engine_error(self, message):
+        """Called from the engine's loop thread when tracking stops on an error."""
+        def show():
+            self.status_var.set(message)
+            self.tracking_status.set("Start Tracking")
+            self._update_activity_indicator()
+        self.ui_updates.put("error", show)
+
     def _update_activity_indicator(self):
         """Update the activity indicator."""
         if not self.running:
             self.activity_var.set("Activity: Not monitoring")
-        elif self.activity_monitor.is_active:
+        elif self.user_active:
             self.activity_var.set("Activity: Active ✓")
         else:
             self.activity_var.set("Activity: Inactive ✗")
 
-    def _tracking_loop(self):
-        """Main tracking loop."""
-        while self.running:
-            try:
-                self.root.after(0, self._update_activity_indicator)
-                
-                if self.activity_monitor.is_active:
-                    for process_name in list(self.config["applications"].keys()):
-                        track_app_usage(process_name, self.config, self.streak_data, self.activity_monitor)
-                    save_streak_data(self.data_file, self.streak_data)
-                    self.root.after(0, self._update_display)
-                
-                time.sleep(self.config["check_interval"])
-                
-                # Sleep for check interval
-                # for _ in range(self.config["check_interval"]):
-                #     if not self.running:
-                #         break
-                #     time.sleep(1)
-            except Exception as e:
-                # print(f"Error in tracking loop: {e}")
-                # self.status_var.set(f"Error: {str(e)}")
-                # self.running = False
-                # self.tracking_status.set("Start Tracking")
-                self.root.after(0, lambda: self.status_var.set(f"Error: {str(e)}"))
-                self.running = False
-                self.root.after(0, lambda: self.tracking_status.set("Start Tracking"))
-                break
-
     def _update_display(self):
-        """Update the statistics display."""
-        # Clear existing widgets
-        for widget in self.stats_content_frame.winfo_children():
-            widget.destroy()
-        
-        # Current date
-        date_label = ttk.Label(self.stats_content_frame, 
-                              text=f"Date: {datetime.date.today().strftime('%Y-%m-%d')}",
-                              font=("Arial", 12, "bold"))
-        date_label.pack(anchor=tk.W, padx=10, pady=(10, 20))
+        """Update the statistics display.
+        
+        Each app keeps one widget group for as long as it is shown; a refresh
+        only touches the labels and progress values whose content changed.
+        """
+        self.date_var.set(f"Date: {datetime.date.today().strftime('%Y-%m-%d')}")
+        
+        # Every tracked app has a record under its display name
+        streak_data = self.snapshot["streak_data"]
+        rollups = self.snapshot.get("rollups", {})
+        shown = set()
+        for app_info in self.snapshot["config"]["applications"].values():
+            app_name = app_info["name"]
+            data = streak_data.get(app_name, {})
+            shown.add(app_name)
+            widgets = self.stat_widgets.get(app_name)
+            if widgets is None:
+                widgets = self._create_stat_widgets(app_name)
+            self._refresh_stat_widgets(widgets, data, app_info["min_minutes"], rollups.get(app_name),
+                                       self.snapshot.get("rollups_since"))
+        
+        # Drop groups for apps that stopped being tracked
+        for app_name in list(self.stat_widgets):
+            if app_name not in shown:
+                self.stat_widgets.pop(app_name)["frame"].destroy()
+
+    def _create_stat_widgets(self, app_name):
+        """Create the widget group showing one app's statistics."""
+        app_frame = ttk.LabelFrame(self.stats_content_frame, text=app_name)
+        app_frame.pack(fill=tk.X, expand=True, padx=10, pady=5)
+        
+        # Current and longest streak
+        current_label = ttk.Label(app_frame)
+        current_label.pack(anchor=tk.W, padx=10, pady=2)
+        longest_label = ttk.Label(app_frame)
+        longest_label.pack(anchor=tk.W, padx=10, pady=2)
+        
+        # Weekly, monthly and yearly totals
+        totals_label = ttk.Label(app_frame)
+        totals_label.pack(anchor=tk.W, padx=10, pady=2)
+        
+        # Today's usage and status indicator
+        progress_frame = ttk.Frame(app_frame)
+        progress_frame.pack(fill=tk.X, padx=10, pady=5)
+        usage_label = ttk.Label(progress_frame)
+        usage_label.pack(side=tk.LEFT)
+        status_label = ttk.Label(progress_frame)
+        status_label.pack(side=tk.RIGHT)
+        
+        # Progress bar
+        progress_bar = ttk.Progressbar(app_frame, orient=tk.HORIZONTAL, length=200, mode='determinate')
+        progress_bar.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        # Daily usage heatmap, one canvas per app with cached year images
+        heatmap = UsageHeatmap(app_frame)
+        heatmap.set_history(self.usage_history.get(app_name, {}))
+        heatmap.canvas.pack(anchor=tk.W, padx=10, pady=(0, 5))
+        
+        # Last streak update, packed only once there is one
+        streak_date_label = ttk.Label(app_frame, font=("Arial", 8))
+        
+        widgets = {
+            "frame": app_frame,
+            "current": current_label,
+            "longest": longest_label,
+            "totals": totals_label,
+            "usage": usage_label,
+            "status": status_label,
+            "progress": progress_bar,
+            "streak_date": streak_date_label,
+            "heatmap": heatmap,
+            "shown": {},  # last values applied to the widgets above
+        }
+        self.stat_widgets[app_name] = widgets
+        return widgets
+
+    def _refresh_stat_widgets(self, widgets, data, min_minutes, totals=None, totals_since=None):
+        """Apply an app's current statistics, skipping values that are unchanged."""
+        totals = totals or {"week": 0, "month": 0, "year": 0}
+        totals_text = (f"This Week: {round(totals['week'])} min · This Month: {round(totals['month'])} min"
+                       f" · This Year: {round(totals['year'])} min")
+        if totals_since:
+            totals_text += f" (since {totals_since})"
+        today_usage = round(data.get("today_usage", 0), 1)
+        done = today_usage >= min_minutes
+        streak_date = data.get("streak_date")
+        values = {
+            "current": f"Current Streak: {data.get('current_streak', 0)} days",
+            "longest": f"Longest Streak: {data.get('longest_streak', 0)} days",
+            "totals": totals_text,
+            "usage": f"Today's Usage: {today_usage}/{min_minutes} minutes",
+            "status": ("✓", "green") if done else ("...", "orange"),
+            # Progress percentage capped at 100%
+            "progress": min(100, (today_usage / min_minutes) * 100),
+            "streak_date": (f"Last streak update: {datetime.date.fromisoformat(streak_date).strftime('%Y-%m-%d')}"
+                            if streak_date else None),
+        }
         
-        # Display stats for each application
-        for app_name, data in self.streak_data.items():
-            # Find the min_minutes for this app
-            min_minutes = 0
-            for process_name, app_info in self.config["applications"].items():
-                if app_info["name"] == app_name:
-                    min_minutes = app_info["min_minutes"]
-                    break
-            
-            # Skip if app is no longer being tracked
-            if min_minutes == 0:
+        shown = widgets["shown"]
+        for key, value in values.items():
+            if shown.get(key, ()) == value:
                 continue
-            
-            # Create a frame for this app
-            app_frame = ttk.LabelFrame(self.stats_content_frame, text=app_name)
-            app_frame.pack(fill=tk.X, expand=True, padx=10, pady=5)
-            
-            # Current streak
-            current_streak = data.get("current_streak", 0)
-            ttk.Label(app_frame, text=f"Current Streak: {current_streak} days").pack(anchor=tk.W, padx=10, pady=2)
-            
-            # Longest streak
-            longest_streak = data.get("longest_streak", 0)
-            ttk.Label(app_frame, text=f"Longest Streak: {longest_streak} days").pack(anchor=tk.W, padx=10, pady=2)
-            
-            # Today's usage
-            today_usage = round(data.get("today_usage", 0), 1)
-            
-            # Progress bar for today's usage
-            progress_frame = ttk.Frame(app_frame)
-            progress_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            ttk.Label(progress_frame, text=f"Today's Usage: {today_usage}/{min_minutes} minutes").pack(side=tk.LEFT)
-            
-            # Calculate progress percentage (capped at 100%)
-            progress_pct = min(100, (today_usage / min_minutes) * 100)
-            
-            # Status indicator
-            if today_usage >= min_minutes:
-                status_label = ttk.Label(progress_frame, text="✓", foreground="green")
+            shown[key] = value
+            widget = widgets[key]
+            if key == "status":
+                widget.configure(text=value[0], foreground=value[1])
+            elif key == "progress":
+                widget["value"] = value
+            elif key == "streak_date":
+                if value is None:
+                    widget.pack_forget()
+                else:
+                    widget.configure(text=value)
+                    widget.pack(anchor=tk.E, padx=10, pady=(0, 5))
             else:
-                status_label = ttk.Label(progress_frame, text="...", foreground="orange")
-            status_label.pack(side=tk.RIGHT)
-            
-            # Progress bar
-            progress_bar = ttk.Progressbar(app_frame, orient=tk.HORIZONTAL, length=200, mode='determinate')
-            progress_bar["value"] = progress_pct
-            progress_bar.pack(fill=tk.X, padx=10, pady=(0, 10))
-            
-            # Last streak update
-            if data.get("streak_date"):
-                streak_date = datetime.date.fromisoformat(data["streak_date"])
-                ttk.Label(app_frame, 
-                         text=f"Last streak update: {streak_date.strftime('%Y-%m-%d')}",
-                         font=("Arial", 8)).pack(anchor=tk.E, padx=10, pady=(0, 5))
+                widget.configure(text=value)
+        widgets["heatmap"].update_today(data.get("today_usage", 0), min_minutes)
 
     def _save_settings(self):
         """Save settings from the settings tab."""
@@ -427,12 +557,10 @@ class StreakTrackerGUI:
             if check_interval < 1 or inactivity_timeout < 1:
                 raise ValueError("Values must be at least 1 second")
             
-            self.config["check_interval"] = check_interval
-            self.config["inactivity_timeout"] = inactivity_timeout
-            save_config(self.config_file, self.config)
-            
-            self.activity_monitor.inactivity_timeout = inactivity_timeout
+            self.engine.update_settings(check_interval, inactivity_timeout, self.tracking_mode_var.get())
             
             messagebox.showinfo("Settings Saved", "Settings have been saved successfully.")
         except ValueError as e:
             messagebox.showerror("Invalid Input", str(e))
+        except TimeoutError as e:
+            messagebox.showwarning("Still Working", f"{e}; the settings will be saved once it catches up.")
@@ -0,0 +1,165 @@
+import os
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class Histogram:
+    """Latency histogram in seconds.
+
+    Bucket counts, the sum and the count are cumulative, as Prometheus
+    expects. The last `window` observations are also kept so recent
+    percentiles can be shown without a metrics server.
+    """
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+    def __init__(self, buckets=BUCKETS, window=256):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        if index < len(self.buckets):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def quantile(self, q):
+        """Return the q-quantile of the rolling window, or None when it is empty."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TickMetrics:
+    """Stage timings and counters for the tracking loop.
+
+    Stages are timed with `time(stage)` into one Histogram each. Counters
+    owned here are bumped with `inc()`; values owned by other objects, such
+    as bytes written by the store, are read through collectors added with
+    `add_collector()` when the metrics are rendered. Everything can be
+    exported in the Prometheus text format, to a file or over HTTP.
+    """
+    STAGES = ("scan", "accounting", "persistence", "ui")
+    PREFIX = "streakr"
+
+    def __init__(self, window=256):
+        self.window = window
+        self.histograms = {stage: Histogram(window=window) for stage in self.STAGES}
+        self.counters = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    @contextmanager
+    def time(self, stage):
+        """Time the body of a `with` block as one observation of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram(window=self.window)
+            self.histograms[stage].observe(seconds)
+
+    def inc(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_collector(self, collector):
+        """Add `collector()`, returning {counter name: value}, to every export."""
+        self._collectors.append(collector)
+
+    def collect_counters(self):
+        """Return own and collected counters by name."""
+        with self._lock:
+            counters = dict(self.counters)
+        for collector in self._collectors:
+            counters.update(collector())
+        return counters
+
+    def summary(self):
+        """Return {stage: {count, p50_ms, p95_ms}} and the counters, for display."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "p50_ms": _ms(histogram.quantile(0.5)),
+                    "p95_ms": _ms(histogram.quantile(0.95)),
+                }
+                for stage, histogram in self.histograms.items()
+            }
+        return {"stages": stages, "counters": self.collect_counters()}
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        name = f"{self.PREFIX}_tick_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each stage of a tracking tick.",
+                 f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        for counter, value in sorted(self.collect_counters().items()):
+            lines.append(f"# TYPE {self.PREFIX}_{counter}_total counter")
+            lines.append(f"{self.PREFIX}_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write render() to `path` atomically, e.g. for node_exporter's textfile collector."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve render() at http://host:port/metrics from a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
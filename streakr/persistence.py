@@ -0,0 +1,159 @@
+import os
+import copy
+import time
+import threading
+from .storage import atomic_write_json
+
+FSYNC_POLICIES = ("always", "shutdown", "never")
+
+
+class WriteBehind:
+    """Persists config and streak data from a background thread.
+
+    Callers mark records dirty and return immediately; the records are copied
+    at that moment, so the writer never reads state another thread is still
+    mutating. Marks arriving within `flush_window` seconds of the first pending
+    one are coalesced into a single write. `fsync` selects when writes are
+    forced to disk: on every flush, only on the final flush at shutdown, or
+    never.
+
+    With `background=False` no writer thread is started; the owner calls
+    flush() itself once flush_delay() says the pending marks are due.
+    """
+    def __init__(self, store, config_file, streak_data, flush_window=30, fsync="shutdown",
+                 background=True):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.store = store
+        self.config_file = config_file
+        self.flush_window = flush_window
+        self.fsync = fsync
+        self.flushes = 0
+        self.last_error = None
+        self.config_mtime = None  # st_mtime_ns of the config file we last wrote
+        self.config_bytes_written = 0
+
+        # The writer's own copy of the streak data, updated from pending marks
+        self._streak_data = {app: dict(record) for app, record in streak_data.items()}
+        self._pending_streaks = {}  # app -> record copy, or None when removed
+        self._pending_config = None
+        self._dirty_since = None
+        self._closing = False
+        self._write_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def mark_config(self, config):
+        """Schedule the config to be written."""
+        snapshot = copy.deepcopy(config)
+        with self._cond:
+            self._pending_config = snapshot
+            self._schedule()
+
+    def mark_streaks(self, streak_data, apps=None):
+        """Schedule streak records to be written.
+
+        `apps` names the records that changed (all of them when omitted); a
+        named app that is no longer in `streak_data` is removed from storage.
+        """
+        if apps is None:
+            apps = list(streak_data)
+        snapshot = {}
+        for app_name in apps:
+            record = streak_data.get(app_name)
+            snapshot[app_name] = dict(record) if record is not None else None
+        with self._cond:
+            self._pending_streaks.update(snapshot)
+            self._schedule()
+
+    @property
+    def config_pending(self):
+        """True while a config write is waiting to be flushed."""
+        return self._pending_config is not None
+
+    @property
+    def bytes_written(self):
+        """Bytes written for config and streak data since startup."""
+        return self.config_bytes_written + getattr(self.store, "bytes_written", 0)
+
+    def flush_delay(self):
+        """Seconds until pending marks are due to be flushed, or None if nothing is pending."""
+        with self._cond:
+            if self._dirty_since is None:
+                return None
+            return max(0, self._dirty_since + self.flush_window - time.monotonic())
+
+    def flush(self, fsync=None):
+        """Write everything pending now, on the calling thread."""
+        if fsync is None:
+            fsync = self.fsync == "always"
+        with self._cond:
+            streaks, self._pending_streaks = self._pending_streaks, {}
+            config, self._pending_config = self._pending_config, None
+            self._dirty_since = None
+        if not streaks and config is None:
+            return
+
+        with self._write_lock:
+            try:
+                if config is not None:
+                    self.config_bytes_written += atomic_write_json(self.config_file, config, fsync)
+                    self.config_mtime = os.stat(self.config_file).st_mtime_ns
+                    config = None
+                if streaks:
+                    for app_name, record in streaks.items():
+                        if record is None:
+                            self._streak_data.pop(app_name, None)
+                        else:
+                            self._streak_data[app_name] = record
+                    self.store.save(self._streak_data, dirty=set(streaks), fsync=fsync)
+                    streaks = {}
+                self.flushes += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                self._requeue(streaks, config)
+
+    def close(self):
+        """Stop the writer thread, flush what is pending and close the store."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush(fsync=self.fsync != "never")
+        self.store.close()
+
+    def _schedule(self):
+        """Start the coalescing window if nothing was pending (lock held)."""
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+            self._cond.notify()
+
+    def _requeue(self, streaks, config):
+        """Put back what a failed flush did not write, unless newer marks exist."""
+        with self._cond:
+            for app_name, record in streaks.items():
+                self._pending_streaks.setdefault(app_name, record)
+            if config is not None and self._pending_config is None:
+                self._pending_config = config
+            if self._dirty_since is None and (self._pending_streaks or self._pending_config):
+                self._dirty_since = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closing:
+                    if self._dirty_since is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._dirty_since + self.flush_window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closing:
+                    return
+            self.flush()
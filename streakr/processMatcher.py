@@ -0,0 +1,235 @@
+import re
+import fnmatch
+
+GLOB_CHARS = "*?["
+REGEX_SPECIAL = ".^$*+?{}[]()|"
+
+
+class ProcessMatcher:
+    """Classifies running processes into tracked applications.
+
+    Each key of config["applications"] matches that process name exactly. An
+    app can list more rules under "match":
+
+    - "python3*"          a glob on the process name (any rule with * ? or [)
+    - "re:python3\\.\\d+"  a regular expression matching the whole name
+    - "exe:/usr/bin/code" an executable path, which may also be a glob
+    - "code-insiders"     any other rule is an exact process name
+
+    Exact names and paths are dict lookups. Glob and regex rules go into a
+    PatternIndex per target (name or exe), which merges them into compiled
+    alternations grouped by literal prefix, so a process is only tried
+    against the rules that could match it; rules with no literal prefix
+    (`*foo`, `re:[Pp]ython`) are tried against every process. Results are cached per (name, exe),
+    so each distinct process is classified once. Exact rules win over
+    patterns; among patterns the first app in config order wins. Invalid
+    rules are reported and skipped.
+    """
+    CACHE_LIMIT = 10000
+
+    def __init__(self, applications):
+        self.exact_exes = {}
+        self._name_index = PatternIndex()
+        self._exe_index = PatternIndex()
+
+        # An app's own key always maps to it, whatever other apps' rules say
+        self.exact_names = {process_name: process_name for process_name in applications}
+        self.rule_count = len(applications)
+        for process_name, app_info in applications.items():
+            for rule in app_info.get("match", ()):
+                self._add_rule(process_name, rule)
+                self.rule_count += 1
+
+        for (_, app), rule, error in self._name_index.compile() + self._exe_index.compile():
+            print(f"Ignoring invalid match rule {rule!r} for {app}: {error}")
+            self.rule_count -= 1
+        self._cache = {}
+
+    @property
+    def needs_exe(self):
+        """True when some rule matches on executable paths."""
+        return bool(self.exact_exes) or bool(self._exe_index)
+
+    def classify(self, name, exe=None):
+        """Return the application key a process belongs to, or None."""
+        key = (name, exe)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if len(self._cache) >= self.CACHE_LIMIT:
+            self._cache.clear()
+        app = self._classify(name, exe)
+        self._cache[key] = app
+        return app
+
+    def running_apps(self, snapshot):
+        """Map a ProcessTracker snapshot (names or (name, exe) pairs) to app keys."""
+        running = set()
+        for identity in snapshot:
+            if identity is None:
+                continue
+            app = self.classify(*identity) if isinstance(identity, tuple) else self.classify(identity)
+            if app is not None:
+                running.add(app)
+        return running
+
+    def group_times(self, times):
+        """Sum {process name: seconds} into {app key: seconds}."""
+        grouped = {}
+        for name, seconds in times.items():
+            app = self.classify(name)
+            if app is not None:
+                grouped[app] = grouped.get(app, 0) + seconds
+        return grouped
+
+    def _classify(self, name, exe):
+        app = self.exact_names.get(name)
+        if app is None and exe is not None:
+            app = self.exact_exes.get(exe)
+        if app is not None:
+            return app
+        matches = [match for match in (self._name_index.match(name), self._exe_index.match(exe)) if match]
+        return min(matches)[1] if matches else None
+
+    def _add_rule(self, app, rule):
+        exact, index = self.exact_names, self._name_index
+        if rule.startswith("exe:"):
+            rule = rule[4:]
+            exact, index = self.exact_exes, self._exe_index
+        if rule.startswith("re:"):
+            pattern = rule[3:]
+            prefix = regex_prefix(pattern)
+        elif any(char in rule for char in GLOB_CHARS):
+            pattern = fnmatch.translate(rule)
+            prefix = rule[:min(rule.find(char) for char in GLOB_CHARS if char in rule)]
+        else:
+            exact.setdefault(rule, app)
+            return
+        index.add(prefix, pattern, (self.rule_count, app), rule)
+
+
+class PatternIndex:
+    """Full-match patterns bucketed by the literal text they must start with.
+
+    Each bucket is compiled into one alternation with a named group per
+    pattern. match() only looks up the buckets whose prefix the text starts
+    with, one dict lookup per distinct prefix length, so its cost does not
+    grow with the number of patterns that cannot match. Patterns without a
+    literal prefix (`*foo`, `re:[Pp]ython`) share the "" bucket, which is
+    tried for every text, so they cost a little on every new process.
+
+    Patterns with capturing groups are compiled on their own instead: inside
+    the alternation their group names could clash and their numbered
+    backreferences would point at the wrong groups.
+    """
+    def __init__(self):
+        self._buckets = {}   # literal prefix -> [(pattern, value, source)]
+        self._compiled = {}  # literal prefix -> ((regex, {group name: value}) or None, [(regex, value)])
+        self._lengths = ()
+
+    def __bool__(self):
+        return bool(self._buckets)
+
+    def add(self, prefix, pattern, value, source=None):
+        """Add `pattern`; every text it matches must start with `prefix`.
+
+        `source` is what compile() reports if the pattern turns out invalid.
+        """
+        self._buckets.setdefault(prefix, []).append((pattern, value, source or pattern))
+
+    def compile(self):
+        """Compile every bucket; return (value, source, error) for invalid patterns, which are dropped."""
+        self._compiled = {}
+        invalid = []
+        for prefix, patterns in self._buckets.items():
+            valid = []
+            combinable = []
+            standalone = []
+            for entry in patterns:
+                pattern, value, source = entry
+                try:
+                    regex = re.compile(pattern)
+                except re.error as e:
+                    invalid.append((value, source, e))
+                    continue
+                valid.append(entry)
+                if regex.groups or len(patterns) == 1:
+                    standalone.append((regex, value))
+                else:
+                    combinable.append(entry)
+            self._buckets[prefix] = valid
+
+            combined = None
+            if combinable:
+                try:
+                    combined = self._compile_bucket(combinable)
+                except re.error:
+                    # Valid alone but not inside an alternation, e.g. inline flags
+                    standalone.extend((re.compile(pattern), value) for pattern, value, _ in combinable)
+            if valid:
+                self._compiled[prefix] = (combined, standalone)
+        self._lengths = sorted({len(prefix) for prefix in self._compiled})
+        return invalid
+
+    @staticmethod
+    def _compile_bucket(patterns):
+        values = {}
+        alternatives = []
+        for group, (pattern, value, _) in enumerate(patterns):
+            values[f"_rule{group}"] = value
+            alternatives.append(f"(?P<_rule{group}>{pattern})")
+        return re.compile("|".join(alternatives)), values
+
+    def match(self, text):
+        """Return the smallest value among the patterns fully matching `text`, or None."""
+        if not text or not self._compiled:
+            return None
+        best = None
+        for length in self._lengths:
+            if length > len(text):
+                break
+            bucket = self._compiled.get(text[:length])
+            if bucket is None:
+                continue
+            combined, standalone = bucket
+            if combined is not None:
+                regex, values = combined
+                # Alternatives are tried in insertion order, so this is the bucket's first
+                found = regex.fullmatch(text)
+                if found:
+                    value = values[found.lastgroup]
+                    if best is None or value < best:
+                        best = value
+            for regex, value in standalone:
+                if (best is None or value < best) and regex.fullmatch(text):
+                    best = value
+        return best
+
+
+def regex_prefix(pattern):
+    """Return literal text that every full match of `pattern` starts with.
+
+    Conservative: stops at the first construct that is not a plain or escaped
+    literal, and gives up on patterns containing alternation.
+    """
+    if "|" in pattern:
+        return ""
+    prefix = []
+    i = 1 if pattern.startswith("^") else 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break  # \d, \w, \1 and the like are not literals
+            literal, step = pattern[i + 1], 2
+        elif char in REGEX_SPECIAL:
+            break
+        else:
+            literal, step = char, 1
+        # A following ?, * or {m,n} may make this character optional
+        if pattern[i + step:i + step + 1] in ("?", "*", "{"):
+            break
+        prefix.append(literal)
+        i += step
+    return "".join(prefix)
@@ -0,0 +1,230 @@
+import os
+import sys
+import errno
+import socket
+import struct
+
+# Linux proc connector constants (see linux/connector.h and linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+NLMSG_DONE = 3
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+
+NLMSG_HEADER = struct.Struct("=IHHII")
+CN_MSG_HEADER = struct.Struct("=IIIIHH")
+PROC_EVENT_HEADER = struct.Struct("=IIQ")
+PID_PAIR = struct.Struct("=II")
+
+
+class ProcConnector:
+    """Receives fork/exec/exit events from the Linux kernel proc connector.
+
+    Subscribing needs CAP_NET_ADMIN, so opening the connector raises OSError
+    for unprivileged users and callers are expected to fall back to polling.
+    """
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.bind((os.getpid(), CN_IDX_PROC))
+            op = struct.pack("=I", PROC_CN_MCAST_LISTEN)
+            cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(op), 0) + op
+            header = NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+            self.sock.send(header + cn_msg)
+            self.sock.setblocking(False)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def drain(self):
+        """Return pending events as (what, pid, extra) tuples without blocking.
+
+        Raises OSError(ENOBUFS) when the kernel dropped events, in which case
+        the caller must resynchronise from a full scan.
+        """
+        events = []
+        offset = NLMSG_HEADER.size + CN_MSG_HEADER.size
+        while True:
+            try:
+                data = self.sock.recv(4096)
+            except BlockingIOError:
+                return events
+            if len(data) < offset + PROC_EVENT_HEADER.size:
+                continue
+            what = PROC_EVENT_HEADER.unpack_from(data, offset)[0]
+            body = offset + PROC_EVENT_HEADER.size
+            if what == PROC_EVENT_FORK:
+                parent_pid, parent_tgid = PID_PAIR.unpack_from(data, body)
+                child_pid, child_tgid = PID_PAIR.unpack_from(data, body + PID_PAIR.size)
+                # Thread creation shows up as a fork within the same tgid
+                if child_pid == child_tgid:
+                    events.append((what, child_tgid, parent_tgid))
+            elif what in (PROC_EVENT_EXEC, PROC_EVENT_COMM, PROC_EVENT_EXIT):
+                pid, tgid = PID_PAIR.unpack_from(data, body)
+                if pid == tgid:
+                    events.append((what, tgid, None))
+
+    def close(self):
+        self.sock.close()
+
+
+class ProcessTracker:
+    """Keeps a PID -> name cache and maintains the set of running process names.
+
+    Each snapshot() only resolves names for PIDs that appeared since the last
+    call, so the steady-state cost follows process churn rather than the total
+    number of processes. On Linux the kernel proc connector is used as an event
+    source when permitted; otherwise the live PID list is polled and diffed.
+
+    With `resolve_exe` set, each process is identified by a (name, exe path)
+    pair instead of its name, for matching rules on executable paths.
+    """
+    def __init__(self, use_events=True, resync_interval=30, resolve_exe=False):
+        # Polling cannot see exec() replacing a process image under the same
+        # PID, so names are fully re-resolved every `resync_interval` snapshots.
+        self.resync_interval = resync_interval
+        self.resolve_exe = resolve_exe
+        self.names = {}        # pid -> name or (name, exe) (None when it could not be read)
+        self.name_counts = {}  # name or (name, exe) -> number of live processes with it
+        self.hits = 0
+        self.misses = 0
+        self.resyncs = 0
+        self._ticks = 0
+        self._connector = None
+        self._primed = False
+
+        if use_events and sys.platform.startswith("linux"):
+            try:
+                self._connector = ProcConnector()
+            except OSError:
+                self._connector = None
+
+    @property
+    def mode(self):
+        return "events" if self._connector else "polling"
+
+    def snapshot(self):
+        """Return the names (or (name, exe) pairs) of currently running processes.
+
+        The returned view is live and is updated in place by the next call.
+        """
+        self._ticks += 1
+        misses = self.misses
+        if not self._primed:
+            self._resync()
+        elif self._connector:
+            try:
+                self._apply_events(self._connector.drain())
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                self._resync()
+        elif self.resync_interval and self._ticks % self.resync_interval == 0:
+            self._resync()
+        else:
+            self._poll()
+        self.hits += max(0, len(self.names) - (self.misses - misses))
+        return self.name_counts.keys()
+
+    def set_resolve_exe(self, resolve_exe):
+        """Switch between name and (name, exe) identities; takes effect with a rescan."""
+        if resolve_exe != self.resolve_exe:
+            self.resolve_exe = resolve_exe
+            self._primed = False
+
+    def stats(self):
+        """Return cache counters."""
+        return {
+            "mode": self.mode,
+            "cached_pids": len(self.names),
+            "hits": self.hits,
+            "misses": self.misses,
+            "resyncs": self.resyncs,
+        }
+
+    def close(self):
+        if self._connector:
+            self._connector.close()
+            self._connector = None
+
+    def _list_pids(self):
+        if sys.platform.startswith("linux"):
+            return {int(entry) for entry in os.listdir("/proc") if entry.isdigit()}
+        import psutil
+        return set(psutil.pids())
+
+    def _resolve(self, pid):
+        import psutil
+        
+        self.misses += 1
+        try:
+            process = psutil.Process(pid)
+            name = process.name() or None
+            if not self.resolve_exe or name is None:
+                return name
+            try:
+                exe = process.exe() or None
+            except psutil.AccessDenied:
+                exe = None
+            return (name, exe)
+        except psutil.NoSuchProcess:
+            return None
+        except psutil.AccessDenied:
+            return None
+
+    def _add(self, pid, name):
+        self.names[pid] = name
+        if name:
+            self.name_counts[name] = self.name_counts.get(name, 0) + 1
+
+    def _discard(self, pid):
+        name = self.names.pop(pid, None)
+        if name:
+            count = self.name_counts[name] - 1
+            if count:
+                self.name_counts[name] = count
+            else:
+                del self.name_counts[name]
+
+    def _resync(self):
+        """Rebuild the cache from scratch."""
+        self.resyncs += 1
+        if self._connector:
+            # Discard events that predate the rescan
+            try:
+                self._connector.drain()
+            except OSError:
+                pass
+        self.names.clear()
+        self.name_counts.clear()
+        for pid in self._list_pids():
+            self._add(pid, self._resolve(pid))
+        self._primed = True
+
+    def _poll(self):
+        """Diff the live PID set against the cache and resolve only new PIDs."""
+        live = self._list_pids()
+        known = self.names.keys()
+        for pid in known - live:
+            self._discard(pid)
+        for pid in live - known:
+            self._add(pid, self._resolve(pid))
+
+    def _apply_events(self, events):
+        for what, pid, parent in events:
+            if what == PROC_EVENT_EXIT:
+                self._discard(pid)
+            elif what == PROC_EVENT_FORK:
+                self._discard(pid)
+                if parent in self.names:
+                    # A forked child shares its parent's name until it execs
+                    self._add(pid, self.names[parent])
+                else:
+                    self._add(pid, self._resolve(pid))
+            else:
+                self._discard(pid)
+                self._add(pid, self._resolve(pid))
@@ -0,0 +1,133 @@
+import datetime
+
+# NumPy is optional and imported on first use; without it the same
+# computation runs as a plain Python loop.
+
+
+def recompute_streaks(history, thresholds, today=None):
+    """Derive streaks from daily usage history.
+
+    `history` is {app: {iso date: minutes}} and `thresholds` is
+    {app: min_minutes}; apps missing from either are skipped. A day counts
+    when its minutes reach the app's threshold. The current streak is the run
+    of counted days ending today, or yesterday while today is still short.
+
+    Returns {app: {"current_streak", "longest_streak", "streak_date",
+    "from_start"}}, where `streak_date` is the last counted day and
+    `from_start` is True when the current run begins on the app's first
+    recorded day, so it may continue from before the history starts.
+    """
+    today = today or datetime.date.today()
+    apps = [app for app in history if app in thresholds and history[app]]
+    if not apps:
+        return {}
+    first_day = min(datetime.date.fromisoformat(min(history[app])) for app in apps)
+    days = (today - first_day).days + 1
+    if days <= 0:
+        return {}
+
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is None:
+        return _recompute_python(history, thresholds, apps, first_day, days)
+    return _recompute_numpy(numpy, history, thresholds, apps, first_day, days)
+
+
+def apply_recomputed_streaks(streak_data, recomputed, keep_longest=False):
+    """Write recomputed streaks into the matching records of `streak_data`.
+
+    A current run that starts on the first recorded day is a lower bound, so
+    a longer existing current streak is kept. With `keep_longest` an existing
+    longest streak is never lowered, which suits repairs of undercounted data
+    rather than threshold changes. Returns the names of the records changed.
+    """
+    changed = []
+    for app, result in recomputed.items():
+        record = streak_data.get(app)
+        if record is None:
+            continue
+        current = result["current_streak"]
+        if result["from_start"]:
+            current = max(current, record.get("current_streak", 0))
+        longest = max(result["longest_streak"], current)
+        if keep_longest:
+            longest = max(longest, record.get("longest_streak", 0))
+        values = {
+            "current_streak": current,
+            "longest_streak": longest,
+            "streak_date": result["streak_date"] or record.get("streak_date"),
+        }
+        if any(record.get(key) != value for key, value in values.items()):
+            record.update(values)
+            changed.append(app)
+    return changed
+
+
+def _recompute_numpy(numpy, history, thresholds, apps, first_day, days):
+    minutes = numpy.zeros((len(apps), days))
+    first_index = numpy.empty(len(apps), dtype=numpy.int64)
+    origin = numpy.datetime64(first_day.isoformat(), "D")
+    for row, app in enumerate(apps):
+        offsets = (numpy.array(list(history[app]), dtype="datetime64[D]") - origin).astype(numpy.int64)
+        values = numpy.fromiter(history[app].values(), dtype=float, count=len(history[app]))
+        inside = offsets < days
+        minutes[row, offsets[inside]] = values[inside]
+        first_index[row] = offsets.min()
+    threshold = numpy.array([thresholds[app] for app in apps], dtype=float)
+
+    # run[a, d]: length of the run of counted days ending on day d (0 if not counted)
+    met = minutes >= threshold[:, None]
+    index = numpy.arange(days)
+    last_miss = numpy.maximum.accumulate(numpy.where(met, -1, index), axis=1)
+    run = numpy.where(met, index - last_miss, 0)
+
+    longest = run.max(axis=1)
+    today_run = run[:, -1]
+    yesterday_run = run[:, -2] if days > 1 else numpy.zeros(len(apps), dtype=run.dtype)
+    current = numpy.where(today_run > 0, today_run, yesterday_run)
+    current_end = numpy.where(today_run > 0, days - 1, days - 2)
+    from_start = (current > 0) & (current_end - current + 1 <= first_index)
+
+    # Last counted day per app, or -1 when none
+    last_met = numpy.where(met.any(axis=1), days - 1 - numpy.argmax(met[:, ::-1], axis=1), -1)
+
+    results = {}
+    for row, app in enumerate(apps):
+        results[app] = _result(int(current[row]), int(longest[row]), int(last_met[row]),
+                               bool(from_start[row]), first_day)
+    return results
+
+
+def _recompute_python(history, thresholds, apps, first_day, days):
+    results = {}
+    for app in apps:
+        threshold = thresholds[app]
+        met_days = {(datetime.date.fromisoformat(date) - first_day).days
+                    for date, minutes in history[app].items() if minutes >= threshold}
+        first_index = min((datetime.date.fromisoformat(date) - first_day).days for date in history[app])
+        run = longest = 0
+        runs = []
+        for day in range(days):
+            run = run + 1 if day in met_days else 0
+            longest = max(longest, run)
+            runs.append(run)
+        current_end = days - 1 if runs[-1] else days - 2
+        current = runs[current_end] if current_end >= 0 else 0
+        from_start = current > 0 and current_end - current + 1 <= first_index
+        last_met = max((day for day in met_days if day < days), default=-1)
+        results[app] = _result(current, longest, last_met, from_start, first_day)
+    return results
+
+
+def _result(current, longest, last_met, from_start, first_day):
+    streak_date = None
+    if last_met >= 0:
+        streak_date = (first_day + datetime.timedelta(days=last_met)).isoformat()
+    return {
+        "current_streak": current,
+        "longest_streak": longest,
+        "streak_date": streak_date,
+        "from_start": from_start,
+    }
@@ -0,0 +1,92 @@
+import asyncio
+
+
+class TickScheduler:
+    """Decides how long the tracking loop sleeps before its next tick.
+
+    - While the user is inactive it sleeps for `max_interval`; activity
+      transitions call wake() so nothing is missed in the meantime.
+    - While no tracked process runs, the interval doubles from
+      `base_interval` up to `max_interval`.
+    - While a running app is short of today's `min_minutes`, the interval
+      shrinks (down to `min_interval`) so the tick that completes the streak
+      lands when the threshold is reached.
+
+    wait() is a coroutine and returns early whenever wake() is called, e.g. on
+    settings changes or on activity transitions. Both must be used from the
+    event loop the scheduler runs on; their Event is created there on first
+    use, as before Python 3.10 an Event binds to the loop current at creation.
+    """
+    def __init__(self, base_interval, max_interval=600, min_interval=5):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.min_interval = min_interval
+        self.last_interval = base_interval
+        self.ticks = 0
+        self.early_wakeups = 0
+        self._idle_interval = base_interval
+        self._wake = None
+
+    def next_interval(self, config, streak_data, snapshot, active):
+        """Return the number of seconds to sleep after this tick."""
+        self.ticks += 1
+        max_interval = max(self.max_interval, self.base_interval)
+        if not active:
+            interval = max_interval
+        else:
+            remaining = self._minutes_to_threshold(config, streak_data, snapshot)
+            if remaining is False:
+                # Nothing tracked is running: back off gradually
+                self._idle_interval = min(max_interval, self._idle_interval * 2)
+                interval = self._idle_interval
+            else:
+                self._idle_interval = self.base_interval
+                interval = self.base_interval
+                if remaining is not None:
+                    floor = min(self.min_interval, self.base_interval)
+                    interval = min(interval, max(floor, remaining * 60))
+        self.last_interval = interval
+        return interval
+
+    async def wait(self, timeout):
+        """Sleep up to `timeout` seconds; return True if woken early."""
+        try:
+            await asyncio.wait_for(self._wake_event().wait(), timeout)
+            woken = True
+        except asyncio.TimeoutError:
+            woken = False
+        self._wake_event().clear()
+        if woken:
+            self.early_wakeups += 1
+        return woken
+
+    def wake(self):
+        """Interrupt the current wait()."""
+        self._wake_event().set()
+
+    def _wake_event(self):
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        return self._wake
+
+    def _minutes_to_threshold(self, config, streak_data, snapshot):
+        """Smallest minutes left until a running app meets today's minimum.
+
+        Returns None when every running app already met it, and False when
+        no tracked app is running at all.
+        """
+        if snapshot is None:
+            return False
+        remaining = None
+        any_running = False
+        for process_name, app_info in config["applications"].items():
+            if process_name not in snapshot:
+                continue
+            any_running = True
+            record = streak_data.get(app_info["name"], {})
+            left = app_info["min_minutes"] - record.get("today_usage", 0)
+            if left > 0 and (remaining is None or left < remaining):
+                remaining = left
+        if not any_running:
+            return False
+        return remaining
@@ -0,0 +1,616 @@
+import os
+import sys
+import json
+import mmap
+import time
+import shutil
+import array
+import struct
+import datetime
+import threading
+
+STORAGE_MODES = ("json", "log", "sqlite", "columnar")
+
+
+def atomic_write_json(path, data, fsync=False):
+    """Write JSON to a temporary file and move it over `path` in one step.
+
+    Returns the number of bytes written.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+        size = f.tell()
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return size
+
+
+def _read_json(path, default):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return default
+
+
+class JsonStore:
+    """Stores streak data as one JSON document rewritten on every save."""
+    keeps_history = False
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.data_files = (data_file,)
+        self.bytes_written = 0
+
+    def load(self):
+        if os.path.exists(self.data_file):
+            return _read_json(self.data_file, {})
+        default_data = {}
+        with open(self.data_file, 'w') as f:
+            json.dump(default_data, f, indent=4)
+        return default_data
+
+    def read(self):
+        """Return the stored streak data without creating or changing any file."""
+        return _read_json(self.data_file, {})
+
+    def save(self, streak_data, dirty=None, fsync=False):
+        self.bytes_written += atomic_write_json(self.data_file, streak_data, fsync)
+
+    def rename(self, old_app, new_app):
+        """Nothing to move: the record is saved under its new name like any change."""
+
+    def close(self):
+        pass
+
+
+class EventLogStore:
+    """Stores streak data as a JSON snapshot plus an append-only delta log.
+
+    Every save appends one compact line holding only the fields that changed
+    since the previous save, so per-tick I/O follows the amount of change
+    rather than the size of the data. Deltas carry absolute values, which makes
+    replaying them idempotent. Once the log grows past `compact_bytes` or gets
+    older than `compact_age` seconds it is rotated and folded into the snapshot
+    by a background thread.
+    """
+    keeps_history = False
+
+    def __init__(self, data_file, compact_bytes=256 * 1024, compact_age=3600):
+        self.data_file = data_file
+        self.log_file = f"{data_file}.log"
+        self.old_log_file = f"{data_file}.log.old"
+        self.data_files = (data_file, self.log_file)
+        self.compact_bytes = compact_bytes
+        self.compact_age = compact_age
+        self.bytes_written = 0
+
+        self._persisted = {}
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_size = 0
+        self._log_started = time.time()
+        self._compactor = None
+
+    def load(self):
+        """Load the snapshot and replay any logged deltas on top of it."""
+        recovered = os.path.exists(self.old_log_file)
+        streak_data = self.read()
+
+        self._persisted = {app: dict(record) for app, record in streak_data.items()}
+        if recovered or not os.path.exists(self.data_file):
+            # A compaction was interrupted (or nothing exists yet): fold
+            # everything into a fresh snapshot before appending again.
+            atomic_write_json(self.data_file, streak_data)
+            for path in (self.old_log_file, self.log_file):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._open_log()
+        return streak_data
+
+    def read(self):
+        """Return the snapshot with the logged deltas replayed, without changing any file."""
+        streak_data = _read_json(self.data_file, {})
+        for path in (self.old_log_file, self.log_file):
+            self._replay(path, streak_data)
+        return streak_data
+
+    def save(self, streak_data, dirty=None, fsync=False):
+        """Append the fields that changed since the last save.
+
+        `dirty` limits the comparison to the named apps; an app that is dirty
+        but missing from `streak_data` is logged as removed.
+        """
+        if dirty is None:
+            candidates = streak_data
+            removed = [app_name for app_name in self._persisted if app_name not in streak_data]
+        else:
+            candidates = [app_name for app_name in dirty if app_name in streak_data]
+            removed = [app_name for app_name in dirty
+                       if app_name not in streak_data and app_name in self._persisted]
+
+        changes = {}
+        for app_name in candidates:
+            record = streak_data[app_name]
+            previous = self._persisted.get(app_name)
+            if previous is None:
+                changes[app_name] = dict(record)
+                continue
+            changed = {key: value for key, value in record.items() if previous.get(key) != value}
+            if changed:
+                changes[app_name] = changed
+        if not changes and not removed:
+            return
+
+        entry = {"d": changes}
+        if removed:
+            entry["r"] = removed
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+
+        with self._lock:
+            if self._log is None:
+                self._open_log()
+            self._log.write(line)
+            self._log.flush()
+            if fsync:
+                os.fsync(self._log.fileno())
+            self._log_size += len(line)
+            self.bytes_written += len(line)
+            for app_name, changed in changes.items():
+                self._persisted.setdefault(app_name, {}).update(changed)
+            for app_name in removed:
+                del self._persisted[app_name]
+
+            if self._should_compact():
+                self._start_compaction()
+
+    def rename(self, old_app, new_app):
+        """Nothing to move: the record is saved under its new name like any change."""
+
+    def close(self):
+        """Wait for a running compaction and close the log."""
+        compactor = self._compactor
+        if compactor:
+            compactor.join()
+        with self._lock:
+            if self._log:
+                self._log.close()
+                self._log = None
+
+    def _replay(self, path, streak_data):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn line from a crash mid-append, which a merged log may
+                    # have in its middle; deltas are absolute, so skip just it
+                    continue
+                for app_name, changed in entry.get("d", {}).items():
+                    streak_data.setdefault(app_name, {}).update(changed)
+                for app_name in entry.get("r", ()):
+                    streak_data.pop(app_name, None)
+
+    def _open_log(self):
+        self._log = open(self.log_file, 'a')
+        self._log_size = self._log.tell()
+        self._log_started = time.time()
+
+    def _should_compact(self):
+        if self._compactor is not None or self._log_size == 0:
+            return False
+        return (self._log_size >= self.compact_bytes or
+                time.time() - self._log_started >= self.compact_age)
+
+    def _start_compaction(self):
+        """Rotate the log and write the snapshot in the background (lock held)."""
+        self._log.close()
+        if os.path.exists(self.old_log_file):
+            # A failed compaction left its rotated log behind: append to it, so
+            # the deltas still replay in order if this compaction fails too
+            with open(self.old_log_file, 'a') as old_log, open(self.log_file, 'r') as log:
+                old_log.write("\n")
+                shutil.copyfileobj(log, old_log)
+            os.remove(self.log_file)
+        else:
+            os.replace(self.log_file, self.old_log_file)
+        self._open_log()
+        snapshot = {app: dict(record) for app, record in self._persisted.items()}
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot,), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, snapshot):
+        try:
+            self.bytes_written += atomic_write_json(self.data_file, snapshot)
+            os.remove(self.old_log_file)
+        finally:
+            with self._lock:
+                self._compactor = None
+
+
+class SqliteStore:
+    """Stores streak records and per-day usage history in a SQLite database.
+
+    Each app's daily minutes live in a `usage` table keyed by (app, date), so
+    past days survive the midnight reset of `today_usage`. A save writes the
+    records that changed since the previous save in a single transaction.
+    """
+    keeps_history = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS streaks (
+            app TEXT PRIMARY KEY,
+            record TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS usage (
+            app TEXT NOT NULL,
+            date TEXT NOT NULL,
+            minutes REAL NOT NULL,
+            PRIMARY KEY (app, date)
+        );
+        -- The (app, date) primary key already serves per-app range scans
+        DROP INDEX IF EXISTS usage_app;
+        CREATE INDEX IF NOT EXISTS usage_date ON usage (date);
+    """
+
+    def __init__(self, data_file, db_file=None):
+        self.data_file = data_file
+        self.db_file = db_file or f"{os.path.splitext(data_file)[0]}.db"
+        self.data_files = (self.db_file, f"{self.db_file}-wal")
+        self.bytes_written = 0  # payload bytes handed to SQLite, not pages written
+        self._persisted = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            import sqlite3
+            
+            # Saves arrive from both the tracking thread and the Tk thread
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def load(self):
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute("SELECT app, record FROM streaks").fetchall()
+        streak_data = {app: json.loads(record) for app, record in rows}
+        if not rows and os.path.exists(self.data_file):
+            # First run on this backend: import the existing JSON data
+            streak_data = _read_json(self.data_file, {})
+            self._persisted = {}
+            self.save(streak_data)
+        self._persisted = {app: dict(record) for app, record in streak_data.items()}
+        return streak_data
+
+    def read(self):
+        """Return the stored streak records without importing or saving anything."""
+        with self._lock:
+            rows = self._connect().execute("SELECT app, record FROM streaks").fetchall()
+        if not rows:
+            return _read_json(self.data_file, {})
+        return {app: json.loads(record) for app, record in rows}
+
+    def save(self, streak_data, dirty=None, fsync=False):
+        """Write changed records and their usage rows in one transaction.
+
+        `dirty` limits the comparison to the named apps. Durability follows
+        SQLite's own journaling, so `fsync` is accepted for interface parity.
+        """
+        apps = streak_data if dirty is None else [app for app in dirty if app in streak_data]
+        changed = {app: dict(streak_data[app]) for app in apps
+                   if self._persisted.get(app) != streak_data[app]}
+        if dirty is None:
+            removed = [app for app in self._persisted if app not in streak_data]
+        else:
+            removed = [app for app in dirty if app not in streak_data and app in self._persisted]
+        if not changed and not removed:
+            return
+
+        usage_rows = []
+        for app, record in changed.items():
+            for date_key, minutes_key in (("previous_date", "previous_usage"),
+                                          ("usage_date", "today_usage")):
+                date = record.get(date_key)
+                if date_key == "usage_date":
+                    date = date or record.get("last_used_date")
+                if date and record.get(minutes_key):
+                    usage_rows.append((app, date, record[minutes_key]))
+
+        records = [(app, json.dumps(record)) for app, record in changed.items()]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO streaks (app, record) VALUES (?, ?)", records)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO usage (app, date, minutes) VALUES (?, ?, ?)",
+                    usage_rows)
+                conn.executemany("DELETE FROM streaks WHERE app = ?", [(app,) for app in removed])
+                conn.executemany("DELETE FROM usage WHERE app = ?", [(app,) for app in removed])
+        self.bytes_written += (sum(len(app) + len(record) for app, record in records) +
+                               sum(len(app) + len(date) + 8 for app, date, _ in usage_rows))
+        self._persisted.update(changed)
+        for app in removed:
+            del self._persisted[app]
+
+    def load_history(self, app=None, start=None, end=None):
+        """Return {app: {date: minutes}}, optionally limited to one app and a date range.
+
+        Dates are ISO strings and the range is inclusive.
+        """
+        query = "SELECT app, date, minutes FROM usage WHERE 1=1"
+        params = []
+        if app is not None:
+            query += " AND app = ?"
+            params.append(app)
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(end)
+        query += " ORDER BY app, date"
+
+        history = {}
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        for app_name, date, minutes in rows:
+            history.setdefault(app_name, {})[date] = minutes
+        return history
+
+    def rename(self, old_app, new_app):
+        """Move the usage history of `old_app` to `new_app`, adding to days `new_app` already has."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO usage (app, date, minutes) SELECT ?, date, minutes FROM usage WHERE app = ? "
+                    "ON CONFLICT (app, date) DO UPDATE SET minutes = minutes + excluded.minutes",
+                    (new_app, old_app))
+                conn.execute("DELETE FROM usage WHERE app = ?", (old_app,))
+
+    def import_history(self, history):
+        """Store {app: {date: minutes}}, replacing the usage of days already recorded."""
+        rows = [(app, date, minutes) for app, days in history.items() for date, minutes in days.items()]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO usage (app, date, minutes) VALUES (?, ?, ?)", rows)
+        self.bytes_written += sum(len(app) + len(date) + 8 for app, date, _ in rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ColumnarStore:
+    """Stores streak records in a small JSON header and daily usage in one array per app.
+
+    Each app's minutes live in their own file of little-endian float32 values,
+    one per day counted from the app's first recorded day, so a day's usage is
+    written in place. Loading reads only the header, and history queries map
+    the arrays and copy just the days in their range, so neither cost grows
+    with the length of the history outside that range.
+    """
+    keeps_history = True
+
+    VERSION = 1
+    EPOCH = datetime.date(2000, 1, 1)
+    DAY = struct.Struct("<f")
+
+    def __init__(self, data_file, history_dir=None):
+        self.data_file = data_file
+        self.history_dir = history_dir or f"{os.path.splitext(data_file)[0]}.history"
+        self.header_file = os.path.join(self.history_dir, "header.json")
+        self.data_files = (self.header_file,)
+        self.bytes_written = 0
+        # columns: app -> {"file": array file name, "start": day number of its first value}
+        self._header = {"version": self.VERSION, "epoch": self.EPOCH.isoformat(),
+                        "next_file": 0, "columns": {}, "records": {}}
+        self._persisted = {}
+        self._files = {}  # app -> array file opened for writing
+        self._lock = threading.Lock()
+
+    def load(self):
+        os.makedirs(self.history_dir, exist_ok=True)
+        header = _read_json(self.header_file, None)
+        if header is None:
+            # First run on this backend: import the existing JSON data
+            streak_data = _read_json(self.data_file, {})
+            self._persisted = {}
+            self.save(streak_data)
+        else:
+            self._header = header
+            streak_data = {app: dict(record) for app, record in header["records"].items()}
+        self._persisted = {app: dict(record) for app, record in streak_data.items()}
+        return streak_data
+
+    def read(self):
+        """Return the stored streak records without writing anything."""
+        header = _read_json(self.header_file, None)
+        if header is None:
+            return _read_json(self.data_file, {})
+        with self._lock:
+            # History queries read the columns this header lists
+            self._header = header
+        return {app: dict(record) for app, record in header["records"].items()}
+
+    def save(self, streak_data, dirty=None, fsync=False):
+        """Write the usage of changed records into their arrays, then the header."""
+        apps = streak_data if dirty is None else [app for app in dirty if app in streak_data]
+        changed = {app: dict(streak_data[app]) for app in apps
+                   if self._persisted.get(app) != streak_data[app]}
+        if dirty is None:
+            removed = [app for app in self._persisted if app not in streak_data]
+        else:
+            removed = [app for app in dirty if app not in streak_data and app in self._persisted]
+        if not changed and not removed and os.path.exists(self.header_file):
+            return
+
+        usage = {}
+        for app, record in changed.items():
+            for date_key, minutes_key in (("previous_date", "previous_usage"),
+                                          ("usage_date", "today_usage")):
+                date = record.get(date_key)
+                if date_key == "usage_date":
+                    date = date or record.get("last_used_date")
+                if date and record.get(minutes_key):
+                    usage.setdefault(app, {})[date] = record[minutes_key]
+
+        with self._lock:
+            self._write_usage(usage, fsync)
+            for app in removed:
+                self._drop_column(app)
+            records = self._header["records"]
+            records.update(changed)
+            for app in removed:
+                records.pop(app, None)
+            self.bytes_written += atomic_write_json(self.header_file, self._header, fsync)
+        self._persisted.update(changed)
+        for app in removed:
+            del self._persisted[app]
+
+    def load_history(self, app=None, start=None, end=None):
+        """Return {app: {date: minutes}}, optionally limited to one app and a date range.
+
+        Dates are ISO strings and the range is inclusive.
+        """
+        first = None if start is None else self._day_number(start)
+        last = None if end is None else self._day_number(end)
+        history = {}
+        with self._lock:
+            for app_name, column in self._header["columns"].items():
+                if app is not None and app_name != app:
+                    continue
+                days = self._read_column(column, first, last)
+                if days:
+                    history[app_name] = days
+        return history
+
+    def import_history(self, history):
+        """Store {app: {date: minutes}}, replacing the usage of days already recorded."""
+        with self._lock:
+            self._write_usage(history)
+            self.bytes_written += atomic_write_json(self.header_file, self._header)
+
+    def rename(self, old_app, new_app):
+        """Move the usage history of `old_app` to `new_app`, adding to days `new_app` already has."""
+        with self._lock:
+            column = self._header["columns"].get(old_app)
+            if column is None:
+                return
+            if new_app not in self._header["columns"]:
+                self._header["columns"][new_app] = self._header["columns"].pop(old_app)
+                f = self._files.pop(old_app, None)
+                if f is not None:
+                    self._files[new_app] = f
+            else:
+                kept = self._read_column(self._header["columns"][new_app], None, None)
+                days = self._read_column(column, None, None)
+                self._write_usage({new_app: {date: kept.get(date, 0) + minutes for date, minutes in days.items()}})
+                self._drop_column(old_app)
+            self.bytes_written += atomic_write_json(self.header_file, self._header)
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+    def _day_number(self, date):
+        return (datetime.date.fromisoformat(date) - self.EPOCH).days
+
+    def _path(self, column):
+        return os.path.join(self.history_dir, column["file"])
+
+    def _write_usage(self, usage, fsync=False):
+        """Write {app: {date: minutes}} into the arrays (lock held)."""
+        for app, days in usage.items():
+            if not days:
+                continue
+            numbers = {self._day_number(date): minutes for date, minutes in days.items()}
+            column = self._column(app, min(numbers))
+            f = self._files.get(app)
+            if f is None:
+                f = self._files[app] = open(self._path(column), 'r+b')
+            for number, minutes in numbers.items():
+                f.seek((number - column["start"]) * self.DAY.size)
+                f.write(self.DAY.pack(minutes))
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+            self.bytes_written += len(numbers) * self.DAY.size
+
+    def _column(self, app, first_day):
+        """Return the column of `app`, creating or extending it back to `first_day`."""
+        column = self._header["columns"].get(app)
+        if column is None:
+            column = {"file": f"{self._header['next_file']}.f32", "start": first_day}
+            self._header["next_file"] += 1
+            self._header["columns"][app] = column
+            # Truncate whatever a crash may have left under this name
+            open(self._path(column), 'wb').close()
+        elif first_day < column["start"]:
+            # Rare (imports only): rewrite the array with the earlier days in front
+            f = self._files.pop(app, None)
+            if f is not None:
+                f.close()
+            path = self._path(column)
+            with open(path, 'rb') as f:
+                values = f.read()
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(bytes((column["start"] - first_day) * self.DAY.size) + values)
+            os.replace(f"{path}.tmp", path)
+            column["start"] = first_day
+        return column
+
+    def _drop_column(self, app):
+        column = self._header["columns"].pop(app, None)
+        f = self._files.pop(app, None)
+        if f is not None:
+            f.close()
+        if column is not None:
+            try:
+                os.remove(self._path(column))
+            except OSError:
+                pass
+
+    def _read_column(self, column, first, last):
+        """Return {date: minutes} of the non-zero days in [first, last] (lock held)."""
+        with open(self._path(column), 'rb') as f:
+            count = os.fstat(f.fileno()).st_size // self.DAY.size
+            begin = 0 if first is None else max(0, first - column["start"])
+            end = count if last is None else min(count, last - column["start"] + 1)
+            if begin >= end:
+                return {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                values = array.array('f', mapped[begin * self.DAY.size:end * self.DAY.size])
+        if sys.byteorder == "big":
+            values.byteswap()
+        start = self.EPOCH + datetime.timedelta(days=column["start"] + begin)
+        return {(start + datetime.timedelta(days=offset)).isoformat(): minutes
+                for offset, minutes in enumerate(values) if minutes}
+
+
+def open_store(data_file, mode="json", **options):
+    """Create the streak data store for the given storage mode."""
+    if mode == "json":
+        return JsonStore(data_file)
+    if mode == "log":
+        return EventLogStore(data_file, **options)
+    if mode == "sqlite":
+        return SqliteStore(data_file, **options)
+    if mode == "columnar":
+        return ColumnarStore(data_file, **options)
+    raise ValueError(f"Unknown storage mode: {mode}")
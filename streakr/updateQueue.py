@@ -0,0 +1,89 @@
+import time
+import threading
+
+
+class UpdateQueue:
+    """Hands UI updates from any thread to the Tk thread, latest state per key.
+
+    put() only touches a lock-protected dict, never Tk, so it is safe from the
+    engine's loop thread and the input listener threads. An update replaces
+    any pending one with the same key, so the queue never holds more than one
+    entry per key and at most `maxsize` keys. The Tk thread drains it every
+    `interval_ms`, and keys given a limit() are applied at most once per their
+    minimum gap, so redraw work stays bounded however fast updates arrive.
+    """
+    def __init__(self, root, interval_ms=100, maxsize=64):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.maxsize = maxsize
+        self.posted = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.dropped = 0
+        self._pending = {}     # key -> (callback, args), in arrival order
+        self._min_gaps = {}    # key -> seconds between applications
+        self._last_applied = {}
+        self._lock = threading.Lock()
+        self._after_id = None
+
+    def limit(self, key, min_gap_ms):
+        """Apply updates for `key` at most once every `min_gap_ms`."""
+        self._min_gaps[key] = min_gap_ms / 1000
+
+    def put(self, key, callback, *args):
+        """Queue `callback(*args)` to run on the Tk thread, replacing a pending update for `key`.
+
+        Returns False if the update was dropped because `maxsize` keys are pending.
+        """
+        with self._lock:
+            self.posted += 1
+            if key in self._pending:
+                self.coalesced += 1
+            elif len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                return False
+            self._pending[key] = (callback, args)
+        return True
+
+    def start(self):
+        """Start draining on the Tk thread; call from that thread."""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def stats(self):
+        return {
+            "ui_updates_posted": self.posted,
+            "ui_updates_coalesced": self.coalesced,
+            "ui_updates_applied": self.applied,
+            "ui_updates_dropped": self.dropped,
+        }
+
+    def _drain(self):
+        now = time.monotonic()
+        with self._lock:
+            due = {}
+            for key, update in self._pending.items():
+                if now - self._last_applied.get(key, 0) >= self._min_gaps.get(key, 0):
+                    due[key] = update
+            for key in due:
+                del self._pending[key]
+        remaining = list(due.items())
+        try:
+            while remaining:
+                key, (callback, args) = remaining.pop(0)
+                self._last_applied[key] = now
+                self.applied += 1
+                callback(*args)
+        finally:
+            if remaining:
+                # A callback raised: keep the updates it would have skipped,
+                # unless a newer one for the same key has arrived since
+                with self._lock:
+                    for key, update in remaining:
+                        self._pending.setdefault(key, update)
+            self._after_id = self.root.after(self.interval_ms, self._drain)
@@ -0,0 +1,128 @@
+import datetime
+import tkinter as tk
+
+CELL = 10
+GAP = 2
+PITCH = CELL + GAP
+LABEL_WIDTH = 40
+YEAR_HEIGHT = 7 * PITCH + GAP
+
+# Unused, under half the daily minimum, under the minimum, met, and met twice over
+LEVELS = ("#ebedf0", "#c6e48b", "#7bc96f", "#239a3b", "#196127")
+
+
+def usage_level(minutes, min_minutes):
+    """Return the LEVELS index for a day's usage against the daily minimum."""
+    if not minutes:
+        return 0
+    ratio = minutes / min_minutes if min_minutes else 1
+    if ratio < 0.5:
+        return 1
+    if ratio < 1:
+        return 2
+    return 3 if ratio < 2 else 4
+
+
+def cell_position(day):
+    """Return the (week column, weekday row) of a date in its year's grid."""
+    offset = datetime.date(day.year, 1, 1).weekday()
+    index = day.timetuple().tm_yday - 1 + offset
+    return index // 7, index % 7
+
+
+class UsageHeatmap:
+    """Calendar heatmap of one app's daily usage, a year per row, on one Canvas.
+
+    Each year is rendered once into a PhotoImage that the canvas shows as a
+    single item, so the canvas holds a handful of items however much history
+    there is. The images are cached per year: today's cell is a separate
+    rectangle drawn over them that a refresh only recolours when its level
+    changes, the current year is re-rendered when the date rolls over, and
+    everything is re-rendered only when new history or a new minimum is shown.
+    """
+    WIDTH = 54 * PITCH + GAP
+
+    def __init__(self, parent):
+        self.canvas = tk.Canvas(parent, height=YEAR_HEIGHT, highlightthickness=0)
+        self._background = self.canvas.cget("background")
+        self._history = {}
+        self._min_minutes = None
+        self._images = {}   # year -> rendered PhotoImage
+        self._today = None
+        self._today_minutes = 0
+        self._today_item = None
+        self._today_level = None
+
+    def set_history(self, history):
+        """Use {iso date: minutes} from the usage history for the days before today."""
+        self._history = dict(history)
+        self._images.clear()
+        self._today = None
+
+    def update_today(self, minutes, min_minutes, today=None):
+        """Show today's usage; draws the cached years first if anything changed."""
+        today = today or datetime.date.today()
+        if min_minutes != self._min_minutes:
+            self._min_minutes = min_minutes
+            self._images.clear()
+            self._today = None
+        if today != self._today:
+            if self._today is not None:
+                if self._today_minutes:
+                    # The finished day becomes part of its year's image
+                    self._history[self._today.isoformat()] = self._today_minutes
+                self._images.pop(self._today.year, None)
+            self._images.pop(today.year, None)
+            self._today = today
+            self._redraw()
+        self._today_minutes = minutes
+        level = usage_level(minutes, self._min_minutes)
+        if level != self._today_level:
+            self._today_level = level
+            self.canvas.itemconfigure(self._today_item, fill=LEVELS[level])
+
+    def _redraw(self):
+        today = self._today
+        first_year = min((int(day[:4]) for day in self._history), default=today.year)
+        years = range(today.year, min(first_year, today.year) - 1, -1)
+
+        self.canvas.delete("all")
+        for row, year in enumerate(years):
+            top = row * YEAR_HEIGHT
+            image = self._images.get(year)
+            if image is None:
+                image = self._images[year] = self._render_year(year, today)
+            self.canvas.create_text(0, top + YEAR_HEIGHT // 2, text=str(year), anchor=tk.W, font=("Arial", 8))
+            self.canvas.create_image(LABEL_WIDTH, top, image=image, anchor=tk.NW)
+        self.canvas.configure(height=len(years) * YEAR_HEIGHT, width=LABEL_WIDTH + self.WIDTH)
+
+        column, weekday = cell_position(today)
+        x = LABEL_WIDTH + GAP + column * PITCH
+        y = GAP + weekday * PITCH
+        self._today_item = self.canvas.create_rectangle(x, y, x + CELL - 1, y + CELL - 1, outline="#555555")
+        self._today_level = None
+
+    def _render_year(self, year, today):
+        """Render a year's cells into a PhotoImage with one put() call."""
+        grid = [[self._background] * 54 for _ in range(7)]
+        day = datetime.date(year, 1, 1)
+        end = min(datetime.date(year, 12, 31), today - datetime.timedelta(days=1))
+        while day <= end:
+            column, weekday = cell_position(day)
+            grid[weekday][column] = LEVELS[usage_level(self._history.get(day.isoformat()), self._min_minutes)]
+            day += datetime.timedelta(days=1)
+
+        gap_row = "{" + " ".join([self._background] * self.WIDTH) + "}"
+        rows = [gap_row] * GAP
+        for colours in grid:
+            pixels = [self._background] * GAP
+            for colour in colours:
+                pixels.extend([colour] * CELL)
+                pixels.extend([self._background] * GAP)
+            row = "{" + " ".join(pixels) + "}"
+            rows.extend([row] * CELL)
+            rows.extend([gap_row] * GAP)
+
+        image = tk.PhotoImage(master=self.canvas, width=self.WIDTH, height=YEAR_HEIGHT)
+        image.put(" ".join(rows))
+        return image
@@ -0,0 +1,138 @@
+import os
+import copy
+import datetime
+import functools
+from .storage import atomic_write_json, _read_json
+
+PERIODS = ("week", "month", "year")
+
+
+def rollups_file(data_file):
+    """Return the rollup file kept beside `data_file`."""
+    return f"{os.path.splitext(data_file)[0]}.rollups.json"
+
+
+@functools.lru_cache(maxsize=64)
+def period_keys(day):
+    """Return the ISO week, month and year keys of an ISO date string."""
+    date = datetime.date.fromisoformat(day)
+    year, week, _ = date.isocalendar()
+    return {"week": f"{year}-W{week:02d}", "month": day[:7], "year": day[:4]}
+
+
+class UsageRollups:
+    """Weekly, monthly and yearly usage minutes per app.
+
+    Totals are updated as minutes are credited, so reading the current
+    period's total is a dict lookup however long the history is. The data is
+    kept in one JSON file beside the streak data and can be rebuilt from the
+    per-day history of a store that keeps one. Totals rebuilt from a partial
+    history record the first day they count in `since`.
+    """
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.apps = {}  # app -> {period: {period key: minutes}}
+        self.since = None
+        self.bytes_written = 0
+        self.last_error = None
+        self._changed = set()  # apps whose totals changed since the last snapshot()
+        self._saved = {}       # the totals save() writes, updated from snapshots
+
+    @property
+    def dirty(self):
+        """True while some totals have not been written."""
+        return bool(self._changed) or self.last_error is not None
+
+    def load(self):
+        """Read the rollup file; returns False when it is missing or unusable."""
+        data = _read_json(self.path, None)
+        self._changed = set()
+        self.last_error = None
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            self.apps = {}
+            self._saved = {}
+            self.since = None
+            return False
+        self.apps = data.get("apps", {})
+        self._saved = copy.deepcopy(self.apps)
+        self.since = data.get("since")
+        return True
+
+    def add(self, app, day, minutes):
+        """Credit `minutes` used on ISO date `day` to every period containing it."""
+        totals = self.apps.get(app)
+        if totals is None:
+            totals = self.apps[app] = {period: {} for period in PERIODS}
+        for period, key in period_keys(day).items():
+            bucket = totals[period]
+            bucket[key] = bucket.get(key, 0) + minutes
+        self._changed.add(app)
+
+    def remove(self, app):
+        if self.apps.pop(app, None) is not None:
+            self._changed.add(app)
+
+    def rename(self, old_app, new_app):
+        """Move the totals of `old_app` to `new_app`, adding to any it already has."""
+        totals = self.apps.pop(old_app, None)
+        if totals is None:
+            return
+        target = self.apps.setdefault(new_app, {period: {} for period in PERIODS})
+        for period, buckets in totals.items():
+            bucket = target[period]
+            for key, minutes in buckets.items():
+                bucket[key] = bucket.get(key, 0) + minutes
+        self._changed.update((old_app, new_app))
+
+    def rebuild(self, history, complete=True):
+        """Replace all totals with ones summed from {app: {iso date: minutes}}.
+
+        Pass complete=False when `history` lacks older days; the totals are
+        then marked as counting from its first day.
+        """
+        self._changed.update(self.apps)
+        self.apps = {}
+        for app, days in history.items():
+            for day, minutes in days.items():
+                self.add(app, day, minutes)
+        self.since = None
+        if not complete:
+            first_days = (min(days) for days in history.values() if days)
+            self.since = min(first_days, default=datetime.date.today().isoformat())
+
+    def summary(self, app, day=None):
+        """Return {period: minutes} for the periods containing `day` (today by default)."""
+        totals = self.apps.get(app, {})
+        keys = period_keys(day or datetime.date.today().isoformat())
+        return {period: totals.get(period, {}).get(key, 0) for period, key in keys.items()}
+
+    def snapshot(self):
+        """Copy the totals changed since the last snapshot, for save() on another thread."""
+        changed, self._changed = self._changed, set()
+        return {"since": self.since,
+                "apps": {app: copy.deepcopy(self.apps[app]) if app in self.apps else None
+                         for app in changed}}
+
+    def save(self, data=None):
+        """Write the totals, updated with `data` from snapshot() or the current changes.
+
+        A failed write is kept in `last_error`, and `dirty` stays True until a
+        later save succeeds.
+        """
+        if data is None:
+            data = self.snapshot()
+        for app, totals in data["apps"].items():
+            if totals is None:
+                self._saved.pop(app, None)
+            else:
+                self._saved[app] = totals
+        document = {"version": self.VERSION, "apps": self._saved}
+        if data["since"]:
+            document["since"] = data["since"]
+        try:
+            self.bytes_written += atomic_write_json(self.path, document)
+            self.last_error = None
+        except OSError as e:
+            self.last_error = e
@@ -1,10 +1,10 @@
 import os
 import json
-import psutil
-import sys
+import time
 import datetime
-from Quartz import (CGWindowListCopyWindowInfo, kCGWindowListOptionOnScreenOnly, 
-                   kCGNullWindowID, kCGWindowOwnerName)
+
+# Platform backends and psutil are imported inside the functions that use
+# them, so importing streakr stays cheap and works on every platform.
 
 def load_config(config_file):
     """Load configuration or create default if it doesn't exist."""
@@ -15,7 +15,11 @@ def load_config(config_file):
         default_config = {
             "applications": {},
             "check_interval": 60,
-            "inactivity_timeout": 120
+            "inactivity_timeout": 120,
+            "storage": "json",
+            "tracking_mode": "running",
+            "flush_window": 30,
+            "fsync": "shutdown"
         }
         with open(config_file, 'w') as f:
             json.dump(default_config, f, indent=4)
@@ -26,8 +30,18 @@ def save_config(config_file, config):
     with open(config_file, 'w') as f:
         json.dump(config, f, indent=4)
 
-def load_streak_data(data_file):
-    """Load streak data or create default if it doesn't exist."""
+def default_display_name(process):
+    """Derive a readable display name from a process or window name."""
+    base_name = os.path.splitext(process)[0]
+    return " ".join(word.capitalize() for word in base_name.split())
+
+def load_streak_data(data_file, store=None):
+    """Load streak data or create default if it doesn't exist.
+    
+    When a store from storage.open_store() is given, loading is delegated to it.
+    """
+    if store is not None:
+        return store.load()
     if os.path.exists(data_file):
         with open(data_file, 'r') as f:
             return json.load(f)
@@ -37,91 +51,162 @@ def load_streak_data(data_file):
             json.dump(default_data, f, indent=4)
         return default_data
 
-def save_streak_data(data_file, streak_data):
-    """Save streak data to file."""
+def save_streak_data(data_file, streak_data, store=None):
+    """Save streak data to file, or through `store` when one is given."""
+    if store is not None:
+        store.save(streak_data)
+        return
     with open(data_file, 'w') as f:
         json.dump(streak_data, f, indent=4)
 
 def get_active_windows():
-    """Get list of active windows based on platform."""
-    active_windows = []
-    if sys.platform == "darwin":  # macOS
-        try:
-            window_list = CGWindowListCopyWindowInfo(kCGWindowListOptionOnScreenOnly, 
-                                                   kCGNullWindowID)
-            for window in window_list:
-                try:
-                    app_name = window.get(kCGWindowOwnerName, "")
-                    if app_name and app_name not in active_windows:
-                        active_windows.append(app_name)
-                except:
-                    continue
-        except ImportError:
-            print("Please install pyobjc-framework-Quartz for window detection on macOS")
-            
-    elif sys.platform == "win32":  # Windows
-        try:
-            import win32gui
-            import win32process
-            
-            def callback(hwnd, windows):
-                if win32gui.IsWindowVisible(hwnd):
-                    title = win32gui.GetWindowText(hwnd)
-                    if title and not title.isspace():
-                        try:
-                            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                            process = psutil.Process(pid)
-                            app_name = process.name()
-                            if app_name and app_name not in windows:
-                                windows.append(app_name)
-                        except:
-                            pass
-            
-            win32gui.EnumWindows(callback, active_windows)
-            
-        except ImportError:
-            print("Please install pywin32 for window detection on Windows")
-            
-    else:  # Linux
-        try:
-            import Xlib
-            import Xlib.display
-            
-            display = Xlib.display.Display()
-            root = display.screen().root
-            
-            window_ids = root.get_full_property(
-                display.intern_atom('_NET_CLIENT_LIST'),
-                Xlib.X.AnyPropertyType
-            ).value
-            
-            for window_id in window_ids:
-                window = display.create_resource_object('window', window_id)
-                try:
-                    wmname = window.get_wm_name()
-                    wmclass = window.get_wm_class()
-                    if wmclass and wmclass[1] not in active_windows:
-                        active_windows.append(wmclass[1])
-                except:
-                    continue
-                    
-        except ImportError:
-            print("Please install python-xlib for window detection on Linux")
-    
-    return sorted(active_windows)
+    """Get list of active windows based on platform.
+    
+    Enumerates synchronously through the shared WindowEnumerator, which keeps
+    its platform connection open between calls.
+    """
+    from .windowEnumerator import get_window_enumerator
+    return get_window_enumerator().refresh()
+
+def get_process_snapshot():
+    """Scan running processes once and return the set of their names."""
+    import psutil
+    
+    running = set()
+    for proc in psutil.process_iter(['name']):
+        name = proc.info['name']
+        if name:
+            running.add(name)
+    return running
+
+class UsageClock:
+    """Measures the real time elapsed between usage samples of each app.
+    
+    Elapsed time comes from a monotonic clock and is capped at `max_gap`
+    seconds, so a suspend/resume (or any stall longer than the expected tick)
+    cannot credit the whole gap as usage. A gap is counted as a suspend when
+    the wall clock ran ahead of the monotonic one, which is how Linux reports
+    time spent asleep, or when the monotonic gap itself exceeds `max_gap`.
+    
+    When an app was running at only one end of a gap it started or stopped at
+    an unknown point inside it, so half the gap is credited. That keeps totals
+    unbiased however long the tick interval is.
+    """
+    SUSPEND_SLACK = 30  # seconds of wall/monotonic drift tolerated before assuming a suspend
+    
+    def __init__(self, max_gap=120):
+        self.max_gap = max_gap
+        self.suspends = 0
+        self._samples = {}  # app name -> (monotonic, wall, running) of the previous sample
+        self._resumed_at = None
+    
+    def reset(self):
+        """Forget all samples, e.g. when tracking (re)starts."""
+        self._samples.clear()
+        self._resumed_at = None
+    
+    def resume(self):
+        """Discard time before now, e.g. when the user becomes active again."""
+        self._resumed_at = time.monotonic()
+    
+    def elapsed(self, app_name, running=True):
+        """Record a sample for `app_name` and return the seconds of usage to credit."""
+        now, wall = time.monotonic(), time.time()
+        previous = self._samples.get(app_name)
+        self._samples[app_name] = (now, wall, running)
+        if previous is None:
+            return 0
+        
+        last, last_wall, was_running = previous
+        if not running and not was_running:
+            return 0
+        if self._resumed_at is not None and self._resumed_at > last:
+            last_wall += self._resumed_at - last
+            last = self._resumed_at
+        gap = now - last
+        if wall - last_wall - gap > self.SUSPEND_SLACK or gap > self.max_gap:
+            self.suspends += 1
+        gap = max(0, min(gap, self.max_gap))
+        return gap if running and was_running else gap / 2
+
+def _split_by_day(start, end):
+    """Split the interval [start, end) into (iso date, seconds) parts at midnight."""
+    parts = []
+    while start.date() < end.date():
+        midnight = datetime.datetime.combine(start.date() + datetime.timedelta(days=1), datetime.time())
+        parts.append((start.date().isoformat(), (midnight - start).total_seconds()))
+        start = midnight
+    parts.append((end.date().isoformat(), (end - start).total_seconds()))
+    return parts
+
+def _roll_over(record, day):
+    """Point today_usage at `day`, keeping the finished day's total; True if it moved."""
+    usage_date = record.get("usage_date", record.get("last_used_date"))
+    if usage_date == day:
+        return False
+    if record.get("today_usage"):
+        # Keep the finished day's total so history-keeping stores can record it
+        record["previous_date"] = usage_date
+        record["previous_usage"] = record["today_usage"]
+    record["today_usage"] = 0
+    record["usage_date"] = day
+    return True
+
+def _credit_usage(record, day, minutes, min_minutes):
+    """Add usage minutes to `day` and extend the streak once the minimum is met."""
+    record["today_usage"] += minutes
+    record["last_used_date"] = day
+    
+    # Check if the minimum usage time has been met for that day
+    if record["today_usage"] >= min_minutes:
+        if record.get("streak_date") != day:
+            record["current_streak"] += 1
+            record["streak_date"] = day
+            if record["current_streak"] > record["longest_streak"]:
+                record["longest_streak"] = record["current_streak"]
+
+def track_all_apps(config, streak_data, snapshot, is_active, clock=None, focus_time=None,
+                   rollups=None):
+    """Track usage of every configured application against one process snapshot.
+    
+    `is_active` is the user's activity, read once for the whole tick. In
+    focus mode (`focus_time` given) no process scan is needed at all.
+    Returns the display names of the apps whose streak record changed.
+    """
+    if snapshot is None and focus_time is None:
+        snapshot = get_process_snapshot()
+    changed = []
+    for process_name in list(config["applications"].keys()):
+        if track_app_usage(process_name, config, streak_data, is_active, snapshot, clock, focus_time,
+                           rollups):
+            changed.append(config["applications"][process_name]["name"])
+    return changed
 
-def track_app_usage(process_name, config, streak_data, activity_monitor):
-    """Track the usage time of a specific application."""
+def track_app_usage(process_name, config, streak_data, is_active, snapshot=None, clock=None,
+                    focus_time=None, rollups=None):
+    """Track the usage time of a specific application.
+    
+    `snapshot` is the set of running process names from get_process_snapshot(),
+    or the app keys a ProcessMatcher found running; when omitted a fresh scan
+    is taken for this call alone. With a UsageClock
+    the time actually elapsed since the app's previous sample is credited, split
+    at midnight; without one a fixed check_interval is assumed per running call.
+    `focus_time` ({app: seconds} from FocusTracker.drain()) switches to counting
+    only the time the app's window had focus. Credited minutes are also added
+    to `rollups` (a UsageRollups) when given. Returns True if the app's
+    streak record changed.
+    """
     app_config = config["applications"].get(process_name)
     if not app_config:
-        return
+        return False
     
     app_name = app_config["name"]
     min_minutes = app_config["min_minutes"]
-    today = datetime.date.today().isoformat()
     
+    changed = False
     # Initialize app entry in streak_data if it doesn't exist
     if app_name not in streak_data:
+        changed = True
         streak_data[app_name] = {
             "current_streak": 0,
             "longest_streak": 0,
@@ -130,36 +215,49 @@ def track_app_usage(process_name, config, streak_data, activity_monitor):
             "streak_date": None
         }
     
-    # Initialize or reset today's usage if it's a new day
-    if streak_data[app_name].get("last_used_date") != today:
-        streak_data[app_name]["today_usage"] = 0
+    record = streak_data[app_name]
+    now = datetime.datetime.now()
     
-    # Check if the app is running
-    is_running = False
-    for proc in psutil.process_iter(['name']):
-        if proc.info['name'] == process_name:
-            is_running = True
-            break
-    
-    # Update usage time only if app is running AND user is active
-    if is_running and activity_monitor.is_active:
-        # Add the time since last check (in minutes)
-        streak_data[app_name]["today_usage"] += config["check_interval"] / 60
-        streak_data[app_name]["last_used_date"] = today
+    if focus_time is not None:
+        # Focused time was measured as it happened; inactive periods are excluded
+        elapsed = focus_time.get(process_name, 0)
+    else:
+        # Check if the app is running
+        if snapshot is None:
+            snapshot = get_process_snapshot()
+        is_running = process_name in snapshot
         
-        # Check if the minimum usage time has been met for today
-        if streak_data[app_name]["today_usage"] >= min_minutes:
-            if streak_data[app_name].get("streak_date") != today:
-                streak_data[app_name]["current_streak"] += 1
-                streak_data[app_name]["streak_date"] = today
-                if streak_data[app_name]["current_streak"] > streak_data[app_name]["longest_streak"]:
-                    streak_data[app_name]["longest_streak"] = streak_data[app_name]["current_streak"]
+        if clock is not None:
+            elapsed = clock.elapsed(app_name, is_running)
+        elif is_running:
+            elapsed = config["check_interval"]
+        else:
+            elapsed = 0
+    
+    # Update usage time only if app was running AND user is active
+    if is_active and elapsed > 0:
+        start = now - datetime.timedelta(seconds=elapsed)
+        for day, seconds in _split_by_day(start, now):
+            usage_date = record.get("usage_date", record.get("last_used_date"))
+            if usage_date and day < usage_date:
+                # Never move today_usage back to an earlier day
+                day = usage_date
+            _roll_over(record, day)
+            _credit_usage(record, day, seconds / 60, min_minutes)
+            changed = True
+            if rollups is not None:
+                rollups.add(app_name, day, seconds / 60)
+    
+    # Initialize or reset today's usage if it's a new day
+    if _roll_over(record, now.date().isoformat()):
+        changed = True
     
     # Check for broken streaks (if last use was more than 1 day ago)
-    if streak_data[app_name].get("last_used_date"):
-        last_date = datetime.date.fromisoformat(streak_data[app_name]["last_used_date"])
-        today_date = datetime.date.today()
-        days_since_last_use = (today_date - last_date).days
+    if record.get("last_used_date"):
+        last_date = datetime.date.fromisoformat(record["last_used_date"])
+        days_since_last_use = (now.date() - last_date).days
         
-        if days_since_last_use > 1:  # If more than 1 day has passed
-            streak_data[app_name]["current_streak"] = 0
+        if days_since_last_use > 1 and record.get("current_streak"):  # If more than 1 day has passed
+            record["current_streak"] = 0
+            changed = True
+    return changed
@@ -0,0 +1,178 @@
+import sys
+import time
+import threading
+
+
+class WindowEnumerator:
+    """Lists the applications that own visible windows, with caching.
+
+    The platform connection (an X display on Linux) is opened once and kept.
+    Results are cached for `ttl` seconds, and get() never blocks on a stale
+    cache: it returns the last result and refreshes in the background. Per
+    window lookups are memoised as well (WM_CLASS per X window, process name
+    per PID on Windows), so a refresh only queries windows it has not seen.
+    """
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self._windows = None
+        self._refreshed_at = None
+        self._refreshing = False
+        self._callbacks = []  # on_refresh callbacks waiting for the running refresh
+        self._state_lock = threading.Lock()
+        self._lock = threading.Lock()  # serialises use of the platform connection
+        self._display = None
+        self._net_client_list = None
+        self._window_classes = {}  # X window id -> WM_CLASS class name
+        self._pid_names = {}       # Windows PID -> process name
+
+    def refresh(self):
+        """Enumerate windows now and return the sorted application names."""
+        with self._lock:
+            names = self._enumerate()
+            self._windows = sorted(names)
+            self._refreshed_at = time.monotonic()
+            return list(self._windows)
+
+    def get(self, on_refresh=None, force=False):
+        """Return the cached application names without waiting.
+
+        When the cache is older than `ttl` (or `force` is set) a background
+        refresh starts, or the one already running is joined, and
+        `on_refresh(windows)` is called from that thread when it finishes.
+        Before the first refresh completes this returns [].
+        """
+        stale = self._refreshed_at is None or time.monotonic() - self._refreshed_at > self.ttl
+        if stale or force:
+            with self._state_lock:
+                if on_refresh:
+                    self._callbacks.append(on_refresh)
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return list(self._windows or [])
+
+    def close(self):
+        with self._lock:
+            if self._display is not None:
+                self._display.close()
+                self._display = None
+
+    def _refresh_in_background(self):
+        try:
+            windows = self.refresh()
+        finally:
+            with self._state_lock:
+                callbacks, self._callbacks = self._callbacks, []
+                self._refreshing = False
+        for on_refresh in callbacks:
+            on_refresh(windows)
+
+    def _enumerate(self):
+        if sys.platform == "darwin":  # macOS
+            return self._enumerate_quartz()
+        elif sys.platform == "win32":  # Windows
+            return self._enumerate_win32()
+        else:  # Linux
+            return self._enumerate_x11()
+
+    def _enumerate_quartz(self):
+        active_windows = set()
+        try:
+            from Quartz import (CGWindowListCopyWindowInfo, kCGWindowListOptionOnScreenOnly,
+                                kCGNullWindowID, kCGWindowOwnerName)
+        except ImportError:
+            print("Please install pyobjc-framework-Quartz for window detection on macOS")
+            return active_windows
+
+        window_list = CGWindowListCopyWindowInfo(kCGWindowListOptionOnScreenOnly,
+                                                 kCGNullWindowID)
+        for window in window_list:
+            try:
+                app_name = window.get(kCGWindowOwnerName, "")
+                if app_name:
+                    active_windows.add(app_name)
+            except:
+                continue
+        return active_windows
+
+    def _enumerate_win32(self):
+        try:
+            import psutil
+            import win32gui
+            import win32process
+        except ImportError:
+            print("Please install pywin32 for window detection on Windows")
+            return set()
+
+        pids = set()
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                title = win32gui.GetWindowText(hwnd)
+                if title and not title.isspace():
+                    try:
+                        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                        pids.add(pid)
+                    except:
+                        pass
+
+        win32gui.EnumWindows(callback, None)
+
+        # Resolve each owning process once, and only when it is new
+        for pid in self._pid_names.keys() - pids:
+            del self._pid_names[pid]
+        for pid in pids - self._pid_names.keys():
+            try:
+                self._pid_names[pid] = psutil.Process(pid).name()
+            except:
+                self._pid_names[pid] = None
+        return {name for name in self._pid_names.values() if name}
+
+    def _enumerate_x11(self):
+        try:
+            import Xlib
+            import Xlib.display
+        except ImportError:
+            print("Please install python-xlib for window detection on Linux")
+            return set()
+
+        try:
+            if self._display is None:
+                self._display = Xlib.display.Display()
+                self._net_client_list = self._display.intern_atom('_NET_CLIENT_LIST')
+            root = self._display.screen().root
+            prop = root.get_full_property(self._net_client_list, Xlib.X.AnyPropertyType)
+        except Exception:
+            # The connection may have dropped; reconnect on the next refresh
+            if self._display is not None:
+                try:
+                    self._display.close()
+                except Exception:
+                    pass
+                self._display = None
+            self._window_classes.clear()
+            return set()
+
+        window_ids = set(prop.value) if prop else set()
+        for window_id in self._window_classes.keys() - window_ids:
+            del self._window_classes[window_id]
+        for window_id in window_ids - self._window_classes.keys():
+            window = self._display.create_resource_object('window', window_id)
+            try:
+                wmclass = window.get_wm_class()
+                self._window_classes[window_id] = wmclass[1] if wmclass else None
+            except:
+                continue
+        return {name for name in self._window_classes.values() if name}
+
+
+_default_enumerator = None
+
+
+def get_window_enumerator():
+    """Return the process-wide WindowEnumerator."""
+    global _default_enumerator
+    if _default_enumerator is None:
+        _default_enumerator = WindowEnumerator()
+    return _default_enumerator